@@ -0,0 +1,62 @@
+"""
+Benchmark the vectorized Appendix J APR solver against the scalar reference.
+
+Usage: python benchmarks/bench_apr.py [loans]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.apr import (  # noqa: E402
+    APR_TOLERANCE,
+    level_payment,
+    payment_matrix,
+    solve_apr,
+    solve_apr_scalar,
+)
+
+REFERENCE_SAMPLE = 200
+
+
+def main(loans: int = 5000) -> None:
+    rng = np.random.default_rng(0)
+    principal = rng.uniform(100000, 800000, loans)
+    rate = rng.uniform(2, 9, loans)
+    term = rng.choice([180, 240, 360], loans)
+    financed = principal * (1 - rng.uniform(0, 0.03, loans))
+    odd = rng.integers(0, 30, loans) / 30
+    payment = level_payment(principal, rate, term)
+    amounts, periods = payment_matrix(
+        [[(p, int(t))] for p, t in zip(payment, term)], [1] * loans
+    )
+
+    start = time.perf_counter()
+    aprs = solve_apr(financed, amounts, periods, odd)
+    vectorized = time.perf_counter() - start
+
+    # The scalar solver is slow, so time a sample and extrapolate
+    sample = min(loans, REFERENCE_SAMPLE)
+    start = time.perf_counter()
+    reference = [
+        solve_apr_scalar(financed[k], amounts[k], periods[k], odd[k])
+        for k in range(sample)
+    ]
+    scalar = (time.perf_counter() - start) * loans / sample
+
+    worst = float(np.max(np.abs(aprs[:sample] - reference)))
+    print(f"loans:            {loans}")
+    print(f"vectorized:       {vectorized * 1000:.1f} ms")
+    print(f"scalar (est.):    {scalar * 1000:.1f} ms")
+    print(f"speedup:          {scalar / vectorized:.0f}x")
+    print(
+        f"max APR diff:     {worst:.2e} percentage points (tolerance {APR_TOLERANCE})"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
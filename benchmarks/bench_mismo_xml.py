@@ -0,0 +1,142 @@
+"""
+Benchmark the streaming MISMO XML writer against building a full DOM.
+
+Usage: python benchmarks/bench_mismo_xml.py [documents]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.mismo_mappings import (  # noqa: E402
+    DOCUMENT_TYPES,
+    MISMO_FIELDS,
+    MISMO_NAMESPACE,
+    MISMO_REFERENCE_MODEL,
+    XML_EXTENSION_NAMESPACE,
+    XML_EXTENSION_PREFIX,
+)
+from utils.mismo_xml import field_groups, iter_mismo_xml  # noqa: E402
+
+OUTPUT = {
+    "GFEOriginationCharges": {
+        "value": 2875.0,
+        "description": "Charges by lender for originating the loan",
+        "flags": ["Above typical range for 1% origination cap"],
+        "tolerance_bucket": "Zero Tolerance",
+        "source_location": "Page 2, Loan Costs Section A",
+    },
+    "APRDelta": 0.31,
+    "APRCheck": {
+        "printed_apr": 6.81,
+        "recomputed_apr": 6.79,
+        "difference": 0.02,
+        "within_tolerance": True,
+        "basis": "Level payments at the note rate",
+        "flags": [],
+    },
+    "DeliveryTimeline": {
+        "received_by_borrower": "2024-03-05",
+        "days_to_close": 10,
+        "compliance_check": "Pass",
+    },
+}
+
+
+def documents(count):
+    for _ in range(count):
+        yield "CD", OUTPUT
+
+
+def streaming(count):
+    """Write chunks to a sink as a chunked HTTP response would"""
+    size = 0
+    for chunk in iter_mismo_xml(documents(count)):
+        size += len(chunk.encode("utf-8"))
+    return size
+
+
+def _sub(parent, path, namespace=MISMO_NAMESPACE):
+    for name in path:
+        parent = ET.SubElement(parent, f"{{{namespace}}}{name}")
+    return parent
+
+
+def dom_tree(count):
+    """The same document as the streaming writer, built as an ElementTree"""
+    ET.register_namespace("", MISMO_NAMESPACE)
+    ET.register_namespace(XML_EXTENSION_PREFIX, XML_EXTENSION_NAMESPACE)
+    root = ET.Element(
+        f"{{{MISMO_NAMESPACE}}}MESSAGE",
+        {"MISMOReferenceModelIdentifier": MISMO_REFERENCE_MODEL},
+    )
+    deals = _sub(root, ("DEAL_SETS", "DEAL_SET", "DEALS"))
+    for form, output in documents(count):
+        loan = _sub(deals, ("DEAL", "LOANS", "LOAN"))
+        detail = _sub(
+            loan,
+            (
+                "DOCUMENT_SPECIFIC_DATA_SETS",
+                "DOCUMENT_SPECIFIC_DATA_SET",
+                "INTEGRATED_DISCLOSURE",
+                "INTEGRATED_DISCLOSURE_DETAIL",
+            ),
+        )
+        _sub(detail, ("IntegratedDisclosureDocumentType",)).text = DOCUMENT_TYPES[form]
+        standard, extension = [], []
+        for name in MISMO_FIELDS:
+            for group in field_groups(name, output[name]):
+                (extension if group[0] else standard).append(group)
+        for _, path, items in standard:
+            container = _sub(loan, path)
+            for element, text in items:
+                _sub(container, (element,)).text = text
+        if extension:
+            other = _sub(loan, ("EXTENSION", "OTHER"))
+            for _, path, items in extension:
+                container = _sub(other, path, XML_EXTENSION_NAMESPACE)
+                for element, text in items:
+                    _sub(container, (element,), XML_EXTENSION_NAMESPACE).text = text
+    return root
+
+
+def dom(count):
+    """Build the full ElementTree, then serialise it in one go"""
+    return len(ET.tostring(dom_tree(count), encoding="utf-8", xml_declaration=True))
+
+
+def check_identical(count=3):
+    streamed = ET.canonicalize("".join(iter_mismo_xml(documents(count))))
+    built = ET.canonicalize(ET.tostring(dom_tree(count), encoding="unicode"))
+    if streamed != built:
+        raise SystemExit("streaming and DOM outputs differ")
+
+
+def measure(fn, count):
+    start = time.perf_counter()
+    size = fn(count)
+    elapsed = time.perf_counter() - start
+    # Memory is traced in a second run so tracing overhead does not skew the timing
+    tracemalloc.start()
+    fn(count)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+def main(count: int = 20000) -> None:
+    check_identical()
+    print(f"documents: {count} (outputs verified identical)")
+    for name, fn in (("streaming", streaming), ("full DOM", dom)):
+        elapsed, peak, size = measure(fn, count)
+        print(
+            f"{name:10} {elapsed * 1000:8.1f} ms  peak {peak / 2**20:7.1f} MiB  output {size / 2**20:6.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
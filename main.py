@@ -1,11 +1,32 @@
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import asyncio
 import json
 import os
-from tools.parse_le_to_mismo import parse_le_to_mismo
-from tools.parse_cd_to_mismo import parse_cd_to_mismo
+import sys
+from utils.mcp_transport import MCPServer, claim_stdout, mcp_router, serve_stdio
+
+# Under --stdio, stdout carries JSON-RPC: claim it before any tool module can print to it
+PROTOCOL_STDOUT = claim_stdout() if __name__ == "__main__" and "--stdio" in sys.argv else None
+
+import pymupdf  # noqa: E402
+from tools import (  # noqa: E402
+    calculate_apr,
+    check_delivery_timeline,
+    compare_offers,
+    get_document_layout,
+    identify_document,
+    parse_cd_to_mismo,
+    parse_le_to_mismo,
+    query_mismo_store,
+)
+from utils.admission import Overloaded, admission  # noqa: E402
+from utils.metrics import metrics  # noqa: E402
+from utils.mismo_xml import XML_MEDIA_TYPE, iter_mismo_xml  # noqa: E402
 
 app = FastAPI(
     title="MCP Mortgage Server",
@@ -26,6 +47,9 @@ app.add_middleware(
 with open("mcp_config.json") as f:
     MCP_CONFIG = json.load(f)
 
+# Tools whose output can be returned as MISMO XML, and the disclosure form they parse
+XML_TOOLS = {"parse_le_to_mismo_json": "LE", "parse_cd_to_mismo_json": "CD"}
+
 class ToolRequest(BaseModel):
     tool: str
     input: Dict[str, Any]
@@ -34,12 +58,63 @@ class ToolRequest(BaseModel):
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
+
 @app.get("/tools")
 async def list_tools():
     return {"tools": MCP_CONFIG["tools"]}
 
+def run_tool(tool_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    # Tools are looked up through their modules so they can be patched where they are defined
+    if tool_name == "hello":
+        name = input_data.get("name", "World")
+        return {"output": f"Hello, {name}!"}
+    elif tool_name == "parse_le_to_mismo_json":
+        return {"output": parse_le_to_mismo.parse_le_to_mismo(input_data)}
+    elif tool_name == "parse_cd_to_mismo_json":
+        return {"output": parse_cd_to_mismo.parse_cd_to_mismo(input_data)}
+    elif tool_name == "query_mismo_store":
+        return {"output": query_mismo_store.query_mismo_store(input_data)}
+    elif tool_name == "check_delivery_timeline":
+        return {"output": check_delivery_timeline.check_delivery_timeline(input_data)}
+    elif tool_name == "calculate_apr":
+        return {"output": calculate_apr.calculate_apr(input_data)}
+    elif tool_name == "compare_offers":
+        return {"output": compare_offers.compare_offers(input_data)}
+    elif tool_name == "identify_document":
+        return {"output": identify_document.identify_document(input_data)}
+    elif tool_name == "get_document_layout":
+        return {"output": get_document_layout.get_document_layout(input_data)}
+    else:
+        raise HTTPException(status_code=400, detail="Unknown tool")
+
+async def execute_tool(tool_name: str, input_data: Dict[str, Any], client_key: Optional[str]) -> Dict[str, Any]:
+    """Run a tool through its admission gate; shared by /call and the MCP transport"""
+    # Calls are queued per tool and scheduled fairly across client keys
+    async with admission.slot(tool_name, client_key):
+        # Tools are CPU/IO bound and synchronous; keep them off the event loop
+        work = asyncio.ensure_future(run_in_threadpool(run_tool, tool_name, input_data))
+        try:
+            return await asyncio.shield(work)
+        except asyncio.CancelledError:
+            # A worker thread cannot be interrupted: hold the slot until it finishes
+            # so a disconnected client's call still counts against the tool's concurrency
+            await _wait_uncancellable(work)
+            raise
+
+async def _wait_uncancellable(work: asyncio.Future) -> None:
+    while not work.done():
+        try:
+            await asyncio.wait({work})
+        except asyncio.CancelledError:
+            continue
+    if not work.cancelled():
+        work.exception()  # Retrieved so an abandoned failure is not logged as unhandled
+
 @app.post("/call")
-async def call_tool(request: ToolRequest):
+async def call_tool(request: ToolRequest, http_request: Request):
     tool_name = request.tool
     input_data = request.input
 
@@ -48,19 +123,37 @@ async def call_tool(request: ToolRequest):
     if not tool_config:
         raise HTTPException(status_code=404, detail=f"Tool {tool_name} not found")
 
+    # X-API-Key is not authenticated here, so a client could send a new value per call
+    # to get its own round-robin turn; fairness is keyed on the client address instead
+    client_key = http_request.client.host if http_request.client else None
     try:
-        if tool_name == "hello":
-            name = input_data.get("name", "World")
-            return {"output": f"Hello, {name}!"}
-        elif tool_name == "parse_le_to_mismo_json":
-            return {"output": parse_le_to_mismo(input_data)}
-        elif tool_name == "parse_cd_to_mismo_json":
-            return {"output": parse_cd_to_mismo(input_data)}
-        else:
-            raise HTTPException(status_code=400, detail="Unknown tool")
+        result = await execute_tool(tool_name, input_data, client_key)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if tool_name in XML_TOOLS and input_data.get("output_format") == "xml":
+        # No Content-Length: the MISMO document is sent chunked as the writer yields it
+        documents = [(XML_TOOLS[tool_name], result["output"])]
+        return StreamingResponse(iter_mismo_xml(documents), media_type=XML_MEDIA_TYPE)
+    return result
+
+async def run_mcp_tool(tool_name: str, arguments: Dict[str, Any], client_key: Optional[str]) -> Any:
+    result = await execute_tool(tool_name, arguments, client_key)
+    if tool_name in XML_TOOLS and arguments.get("output_format") == "xml":
+        return "".join(iter_mismo_xml([(XML_TOOLS[tool_name], result["output"])]))
+    return result["output"]
+
+# Native MCP transport (JSON-RPC 2.0) over the same registry: POST /mcp, or stdio with --stdio
+mcp_server = MCPServer(app.title, app.version, lambda: MCP_CONFIG["tools"], run_mcp_tool)
+app.include_router(mcp_router(mcp_server))
+
 if __name__ == "__main__":
+    if PROTOCOL_STDOUT is not None:
+        # MuPDF warnings would otherwise be printed into the protocol stream
+        pymupdf.set_messages(fd=2)
+        asyncio.run(serve_stdio(mcp_server, writer=PROTOCOL_STDOUT))
+        sys.exit(0)
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", 8000)))
@@ -38,6 +38,7 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from dotenv import load_dotenv
+from utils.admission import Overloaded, admission
 
 # Version and metadata
 __version__ = "0.1.0"  # Following semver: MAJOR.MINOR.PATCH
@@ -176,13 +177,17 @@ async def call_tool(
         raise HTTPException(status_code=404, detail=f"Tool {tool_name} not found")
 
     try:
-        if tool_name == "hello":
-            name = input_data.get("name", "World")
-            return {"output": f"Hello, {name}!"}
-        else:
-            raise HTTPException(status_code=400, detail="Unknown tool")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        async with admission.slot(tool_name, api_key):
+            try:
+                if tool_name == "hello":
+                    name = input_data.get("name", "World")
+                    return {"output": f"Hello, {name}!"}
+                else:
+                    raise HTTPException(status_code=400, detail="Unknown tool")
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 
 if __name__ == "__main__":
     import uvicorn
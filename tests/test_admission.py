@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from utils.admission import AdmissionController, Overloaded, ToolGate
+
+
+async def _hold(gate, key, started, release, order):
+    async with gate.slot(key):
+        order.append(key)
+        started.set()
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_queue_full_is_rejected_with_retry_after():
+    gate = ToolGate("parse_cd_to_mismo_json", max_concurrent=1, max_queued=1)
+    gate._service_times.extend([2.0, 4.0])
+    release, started, order = asyncio.Event(), asyncio.Event(), []
+
+    running = asyncio.create_task(_hold(gate, "a", started, release, order))
+    await started.wait()
+    queued = asyncio.create_task(_hold(gate, "b", asyncio.Event(), release, order))
+    await asyncio.sleep(0)
+    assert (gate.active, gate.queued) == (1, 1)
+
+    with pytest.raises(Overloaded) as exc:
+        async with gate.slot("c"):
+            pass
+    # Mean service time of 3s, one call already waiting
+    assert exc.value.retry_after == 6
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert order == ["a", "b"]
+    assert (gate.active, gate.queued) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_round_robin_across_keys():
+    gate = ToolGate("calculate_apr", max_concurrent=1, max_queued=10)
+    order = []
+    gates = {}
+
+    async def call(key, n):
+        async with gate.slot(key):
+            order.append(f"{key}{n}")
+            await gates[(key, n)].wait()
+
+    gates[("a", 0)] = asyncio.Event()
+    first = asyncio.create_task(call("a", 0))
+    await asyncio.sleep(0)
+    tasks = []
+    for key, n in [("a", 1), ("a", 2), ("a", 3), ("b", 1)]:
+        gates[(key, n)] = asyncio.Event()
+        gates[(key, n)].set()
+        tasks.append(asyncio.create_task(call(key, n)))
+        await asyncio.sleep(0)
+
+    gates[("a", 0)].set()
+    await asyncio.gather(first, *tasks)
+    assert order == ["a0", "a1", "b1", "a2", "a3"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    gate = ToolGate("compare_offers", max_concurrent=1, max_queued=1)
+    release, started = asyncio.Event(), asyncio.Event()
+    running = asyncio.create_task(_hold(gate, "a", started, release, []))
+    await started.wait()
+
+    waiting = asyncio.create_task(_hold(gate, "b", asyncio.Event(), release, []))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert gate.queued == 0
+
+    release.set()
+    await running
+    assert gate.active == 0
+
+
+def test_call_returns_503_when_overloaded(test_client):
+    with patch("main.admission", AdmissionController(max_concurrent=0, max_queued=0)):
+        response = test_client.post("/call", json={"tool": "hello", "input": {}})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_call_is_keyed_on_client_address_not_api_key_header(test_client):
+    with patch("main.execute_tool", AsyncMock(return_value={"output": "ok"})) as run:
+        for api_key in ["a", "b"]:
+            test_client.post(
+                "/call",
+                json={"tool": "hello", "input": {}},
+                headers={"X-API-Key": api_key},
+            )
+    assert [call.args[2] for call in run.call_args_list] == ["testclient", "testclient"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_call_holds_its_slot_until_the_thread_finishes():
+    import threading
+    import main
+
+    started, finish = threading.Event(), threading.Event()
+
+    def blocking_tool(tool_name, input_data):
+        started.set()
+        finish.wait(5)
+        return {"output": "done"}
+
+    controller = AdmissionController(max_concurrent=1, max_queued=0)
+    with patch("main.admission", controller), patch("main.run_tool", blocking_tool):
+        call = asyncio.ensure_future(main.execute_tool("calculate_apr", {}, "client"))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        call.cancel()
+        await asyncio.sleep(0.05)
+        # The client is gone but its thread is still running
+        assert not call.done()
+        assert controller.gate("calculate_apr").active == 1
+
+        finish.set()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        assert controller.gate("calculate_apr").active == 0
@@ -0,0 +1,103 @@
+import pytest
+from utils.analytics_store import ColumnarStore, record_from_output
+
+CAP_FLAG = "Above typical range for 1% origination cap"
+
+
+def _output(charges, apr_delta, flags=(), received="2024-03-05"):
+    return {
+        "GFEOriginationCharges": {
+            "value": charges,
+            "flags": list(flags),
+            "tolerance_bucket": "Zero Tolerance",
+        },
+        "APRDelta": apr_delta,
+        "DeliveryTimeline": {
+            "received_by_borrower": received,
+            "days_to_close": 10,
+            "compliance_check": "Pass",
+        },
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ColumnarStore(str(tmp_path / "analytics"))
+    store.append(
+        record_from_output(
+            "CD", _output(2875.0, 0.31, [CAP_FLAG]), {"lender": "Acme Bank"}
+        )
+    )
+    store.append(
+        record_from_output("CD", _output(1500.0, 0.12), {"lender": "Acme Bank"})
+    )
+    store.append(
+        record_from_output(
+            "LE", _output(3100.0, 0.40, [CAP_FLAG]), {"lender": "Beta Lending"}
+        )
+    )
+    store.append(record_from_output("CD", {"APRDelta": 0.27}, {}))
+    return store
+
+
+def test_empty_store(tmp_path):
+    result = ColumnarStore(str(tmp_path / "empty")).query()
+    assert result == {"rows_scanned": 0, "rows_matched": 0, "groups": []}
+
+
+def test_filter_cds_by_apr_delta(store):
+    result = store.query(
+        filters=[
+            {"column": "form", "op": "==", "value": "CD"},
+            {"column": "apr_delta", "op": ">", "value": 0.25},
+        ]
+    )
+    assert result["rows_scanned"] == 4
+    assert result["groups"] == [{"count": 2}]
+
+
+def test_flagged_origination_charges_by_lender(store):
+    result = store.query(
+        filters=[{"column": "flags", "op": "has", "value": CAP_FLAG}],
+        group_by="lender",
+        metrics=[{"op": "count"}, {"op": "sum", "column": "origination_charges"}],
+    )
+    assert result["groups"] == [
+        {"count": 1, "lender": "Acme Bank", "sum_origination_charges": 2875.0},
+        {"count": 1, "lender": "Beta Lending", "sum_origination_charges": 3100.0},
+    ]
+
+
+def test_aggregations_skip_missing_values(store):
+    result = store.query(
+        filters=[{"column": "form", "op": "in", "value": ["CD"]}],
+        metrics=[
+            {"op": "mean", "column": "origination_charges"},
+            {"op": "min", "column": "apr_delta"},
+        ],
+    )
+    assert result["groups"] == [
+        {"count": 3, "mean_origination_charges": 2187.5, "min_apr_delta": 0.12}
+    ]
+
+
+def test_date_filter(store):
+    result = store.query(
+        filters=[{"column": "received_by_borrower", "op": ">=", "value": "2024-03-01"}]
+    )
+    assert result["rows_matched"] == 3
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"filters": [{"column": "loan_id", "op": "==", "value": "1"}]},
+        {"filters": [{"column": "lender", "op": ">", "value": "Acme Bank"}]},
+        {"group_by": "apr_delta"},
+        {"metrics": [{"op": "median", "column": "apr_delta"}]},
+        {"metrics": [{"op": "sum", "column": "lender"}]},
+    ],
+)
+def test_invalid_queries(store, kwargs):
+    with pytest.raises(ValueError):
+        store.query(**kwargs)
@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+from datetime import date
+from tools.calculate_apr import calculate_apr
+from utils.apr import (
+    APR_TOLERANCE,
+    level_payment,
+    odd_period,
+    payment_matrix,
+    solve_apr,
+    solve_apr_scalar,
+)
+
+
+def test_level_payment():
+    assert level_payment(250000, 6.5, 360) == pytest.approx(1580.17, abs=0.01)
+    assert level_payment(120000, 0, 120) == pytest.approx(1000.0)
+
+
+def test_odd_period_counts_whole_months_backward():
+    assert odd_period(date(2024, 3, 15), date(2024, 5, 1)) == (
+        1,
+        pytest.approx(17 / 30),
+    )
+    assert odd_period(date(2024, 3, 1), date(2024, 4, 1)) == (1, 0.0)
+    assert odd_period(date(2024, 3, 20), date(2024, 4, 1)) == (
+        0,
+        pytest.approx(12 / 30),
+    )
+    with pytest.raises(ValueError):
+        odd_period(date(2024, 4, 1), date(2024, 4, 1))
+
+
+def test_vectorized_matches_scalar_reference():
+    rng = np.random.default_rng(3)
+    n = 50
+    principal = rng.uniform(100000, 800000, n)
+    rate = rng.uniform(2, 9, n)
+    term = rng.choice([180, 240, 360], n)
+    financed = principal * (1 - rng.uniform(0, 0.03, n))
+    odd = rng.integers(0, 30, n) / 30
+    payment = level_payment(principal, rate, term)
+    amounts, periods = payment_matrix(
+        [[(p, int(t))] for p, t in zip(payment, term)], [1] * n
+    )
+
+    aprs = solve_apr(financed, amounts, periods, odd)
+    for k in range(n):
+        reference = solve_apr_scalar(financed[k], amounts[k], periods[k], odd[k])
+        assert abs(aprs[k] - reference) < APR_TOLERANCE
+        assert aprs[k] == pytest.approx(reference, abs=1e-6)
+
+
+def test_calculate_apr_tool():
+    result = calculate_apr(
+        {
+            "loans": [
+                {
+                    "loan_amount": 250000,
+                    "note_rate": 6.5,
+                    "term_months": 360,
+                    "prepaid_finance_charges": 5000,
+                },
+                {
+                    "loan_amount": 250000,
+                    "note_rate": 6.5,
+                    "term_months": 360,
+                    "prepaid_finance_charges": 5000,
+                    "consummation_date": "2024-03-15",
+                    "first_payment_date": "2024-05-01",
+                },
+                {
+                    "loan_amount": 200000,
+                    "payment_streams": [
+                        {"amount": 1500, "count": 60},
+                        {"amount": 1400, "count": 300},
+                    ],
+                },
+            ]
+        }
+    )
+    first, odd, stepped = result["loans"]
+    assert first["apr"] == 6.695
+    assert first["amount_financed"] == 245000.0
+    assert first["finance_charge"] == pytest.approx(
+        first["total_of_payments"] - 245000.0
+    )
+    # A longer first period spreads the same finance charge over more time
+    assert odd["apr"] < first["apr"]
+    assert stepped["total_of_payments"] == 510000.0
+
+
+def test_calculate_apr_requires_payments():
+    with pytest.raises(ValueError):
+        calculate_apr({"loans": [{"loan_amount": 250000, "term_months": 360}]})
+
+
+def test_odd_days_past_a_month_become_whole_periods():
+    base = {
+        "loan_amount": 250000,
+        "note_rate": 6.5,
+        "term_months": 360,
+        "prepaid_finance_charges": 5000,
+    }
+    long_first, explicit = calculate_apr(
+        {
+            "loans": [
+                dict(base, odd_days=45),
+                dict(
+                    base,
+                    consummation_date="2024-02-15",
+                    first_payment_date="2024-05-01",
+                ),
+            ]
+        }
+    )["loans"]
+    # A regular month plus 45 odd days is two whole periods and 15 days, like the dated loan
+    assert long_first["apr"] == explicit["apr"]
+
+
+def test_negative_apr_is_flagged():
+    result = calculate_apr(
+        {"loans": [{"loan_amount": 100000, "payment": 200, "term_months": 360}]}
+    )
+    loan = result["loans"][0]
+    assert loan["apr"] is None
+    assert loan["flags"] == [
+        "Payments total less than the amount financed; the APR would be negative"
+    ]
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from datetime import date, timedelta
+from tools.check_delivery_timeline import check_delivery_timeline
+from utils.business_days import (
+    add_business_days,
+    federal_holidays,
+    is_business_day,
+    timeline_records,
+)
+
+
+def _add_business_days_reference(start, days):
+    day = start
+    while days > 0:
+        day += timedelta(days=1)
+        if day.weekday() != 6 and day not in federal_holidays(day.year):
+            days -= 1
+    return day
+
+
+def test_holidays_use_actual_dates():
+    assert date(2024, 11, 28) in federal_holidays(2024)  # Thanksgiving
+    assert date(2024, 5, 27) in federal_holidays(2024)  # Memorial Day
+    assert date(2020, 6, 19) not in federal_holidays(2020)
+    # July 4, 2026 is a Saturday; the Friday before is still a business day
+    assert not is_business_day("2026-07-04")[0]
+    assert is_business_day("2026-07-03")[0]
+
+
+def test_add_business_days_matches_reference():
+    rng = np.random.default_rng(7)
+    starts = [
+        date(2000, 1, 1) + timedelta(days=int(n))
+        for n in rng.integers(0, 365 * 40, 500)
+    ]
+    for days in (3, 7):
+        expected = [_add_business_days_reference(s, days) for s in starts]
+        result = add_business_days(starts, days)
+        assert [d.item() for d in result] == expected
+
+
+def test_timeline_records():
+    records = timeline_records(
+        "CD",
+        ["2024-03-01", "2024-11-25", "2024-03-01"],
+        ["2024-03-15", "2024-12-02", None],
+    )
+    assert records[0] == {
+        "received_by_borrower": "2024-03-05",
+        "days_to_close": 10,
+        "compliance_check": "Pass",
+    }
+    # Thanksgiving and the Sunday push receipt to Nov 29 and the earliest closing to Dec 3
+    assert records[1] == {
+        "received_by_borrower": "2024-11-29",
+        "days_to_close": 3,
+        "compliance_check": "Fail",
+    }
+    assert records[2] == {
+        "received_by_borrower": "2024-03-05",
+        "days_to_close": None,
+        "compliance_check": "Unknown",
+    }
+
+
+def test_le_waiting_period_runs_from_delivery():
+    records = timeline_records(
+        "LE", ["2024-03-01", "2024-03-01"], ["2024-03-09", "2024-03-08"]
+    )
+    assert [r["compliance_check"] for r in records] == ["Pass", "Fail"]
+
+
+def test_dates_outside_calendar():
+    with pytest.raises(ValueError, match="business-day calendar"):
+        timeline_records("CD", ["1985-01-02"], ["1985-02-01"])
+
+
+def test_check_delivery_timeline_tool():
+    result = check_delivery_timeline(
+        {
+            "form": "CD",
+            "loans": [{"date_issued": "2024-03-01", "closing_date": "2024-03-15"}],
+        }
+    )
+    assert result["timelines"][0]["compliance_check"] == "Pass"
+    with pytest.raises(ValueError):
+        check_delivery_timeline(
+            {"form": "GFE", "loans": [{"date_issued": "2024-03-01"}]}
+        )
@@ -0,0 +1,91 @@
+import pytest
+from tools.compare_offers import compare_offers
+from utils.comparison import amortization_grid
+
+OFFERS = [
+    {
+        "name": "No points",
+        "loan_amount": 300000,
+        "interest_rate": 7.0,
+        "term_months": 360,
+        "closing_costs": 6000,
+    },
+    {
+        "name": "1 point",
+        "loan_amount": 300000,
+        "interest_rate": 6.75,
+        "term_months": 360,
+        "closing_costs": 6000,
+        "discount_points": 3000,
+    },
+    {
+        "name": "15 year",
+        "loan_amount": 300000,
+        "interest_rate": 6.0,
+        "term_months": 180,
+        "closing_costs": 6500,
+    },
+]
+
+
+def _amortize_reference(principal, annual_rate, term, payment):
+    rate = annual_rate / 1200
+    balance, rows = principal, []
+    for _ in range(term):
+        interest = balance * rate
+        balance -= payment - interest
+        rows.append((interest, max(balance, 0.0)))
+    return rows
+
+
+def test_amortization_grid_matches_month_by_month_schedule():
+    grid = amortization_grid([300000, 300000], [7.0, 6.0], [360, 180])
+    for row, (rate, term) in enumerate([(7.0, 360), (6.0, 180)]):
+        reference = _amortize_reference(
+            300000, rate, term, grid["monthly_payment"][row]
+        )
+        for month in (0, 59, term - 1):
+            assert grid["interest"][row, month] == pytest.approx(
+                reference[month][0], abs=1e-6
+            )
+            assert grid["balance"][row, month] == pytest.approx(
+                reference[month][1], abs=1e-6
+            )
+    # The 15-year offer is paid off and zero-filled after month 180
+    assert grid["payment"][1, 180:].sum() == 0
+    assert grid["principal"][1].sum() == pytest.approx(300000)
+
+
+def test_compare_offers():
+    result = compare_offers({"offers": OFFERS, "horizons": [24, 60, 360]})
+    no_points, one_point, fifteen = result["offers"]
+    assert no_points["monthly_payment"] == 1995.91
+    assert no_points["break_even_month"] is None
+    # $3,000 of points at a 0.25% lower rate pays for itself in the fifth year
+    assert one_point["break_even_month"] == 48
+    assert fifteen["horizons"][2]["principal_paid"] == pytest.approx(300000)
+    assert len(fifteen["schedule"]["balance"]) == 180
+    assert [c["offer"] for c in result["cheapest_by_horizon"]] == [
+        "15 year",
+        "15 year",
+        "15 year",
+    ]
+
+
+def test_compare_offers_without_schedule():
+    result = compare_offers({"offers": OFFERS[:1], "include_schedule": False})
+    assert "schedule" not in result["offers"][0]
+    assert [h["months"] for h in result["offers"][0]["horizons"]] == [60, 84, 120, 360]
+
+
+@pytest.mark.parametrize(
+    "input_data",
+    [
+        {"offers": []},
+        {"offers": [{"loan_amount": 300000, "interest_rate": 7.0}]},
+        {"offers": OFFERS, "horizons": [0]},
+    ],
+)
+def test_compare_offers_invalid_input(input_data):
+    with pytest.raises(ValueError):
+        compare_offers(input_data)
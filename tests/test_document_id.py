@@ -0,0 +1,118 @@
+from unittest.mock import patch
+
+import pymupdf
+import pytest
+
+from tools.identify_document import identify_document
+from tools.parse_le_to_mismo import parse_le_to_mismo
+from utils.document_id import DocumentTypeError, check_document, identify_pdf
+
+
+def make_pdf(page_count, header="", footer="", body=""):
+    doc = pymupdf.open()
+    for n in range(page_count):
+        page = doc.new_page()
+        if n == 0:
+            if header:
+                page.insert_text((72, 60), header)
+            if body:
+                page.insert_text((72, 400), body)
+            if footer:
+                page.insert_text((72, page.rect.height - 30), footer)
+    return doc
+
+
+def cd_pdf():
+    return make_pdf(
+        5, "Closing Disclosure", "CLOSING DISCLOSURE PAGE 1 OF 5 - LOAN ID # 123"
+    )
+
+
+def test_identifies_le_and_cd():
+    le = identify_pdf(
+        make_pdf(3, "Loan Estimate", "LOAN ESTIMATE PAGE 1 OF 3 - LOAN ID # 123")
+    )
+    assert le.document_type == "LE"
+    assert le.signals == ["title", "footer", "page_count"]
+
+    cd = identify_pdf(cd_pdf())
+    assert (cd.document_type, cd.page_count, cd.score) == ("CD", 5, 6)
+
+
+def test_title_is_read_from_the_heading_not_the_header_text():
+    # Page 1 of a CD with addenda: the header mentions the LE and the footer has no form name
+    doc = make_pdf(8, footer="PAGE 1 OF 8 - LOAN ID # 123456789")
+    page = doc[0]
+    page.insert_text((36, 50), "Closing Disclosure", fontsize=20)
+    page.insert_text(
+        (36, 70),
+        "This form is a statement of final loan terms and closing costs. Compare this",
+        fontsize=9,
+    )
+    page.insert_text((36, 81), "document with your Loan Estimate.", fontsize=9)
+    page.insert_text(
+        (36, 110),
+        "Closing Information        Transaction Information        Loan Information",
+        fontsize=9,
+    )
+    identity = identify_pdf(doc)
+    assert identity.document_type == "CD"
+    assert identity.signals == ["title"]
+
+
+def test_tied_scores_are_unidentified():
+    # CD title against an LE footer and page count: nothing to choose between them
+    identity = identify_pdf(
+        make_pdf(3, "Closing Disclosure", "LOAN ESTIMATE PAGE 1 OF 3")
+    )
+    assert identity.document_type is None
+    with pytest.raises(DocumentTypeError, match="not a TRID"):
+        check_document(identity, "CD")
+
+
+def test_body_text_is_not_fingerprinted():
+    identity = identify_pdf(
+        make_pdf(5, "Bank Statement", body="Closing Disclosure attached separately")
+    )
+    assert identity.document_type is None
+    assert identity.has_text_layer
+
+
+def test_scanned_pdf_has_no_text_layer():
+    identity = identify_pdf(make_pdf(5))
+    assert (identity.document_type, identity.has_text_layer) == (None, False)
+    with pytest.raises(DocumentTypeError, match="no text layer"):
+        check_document(identity, "CD")
+
+
+def test_wrong_form_is_rejected_before_extraction():
+    with patch("utils.disclosure.fetch_pdf", return_value=cd_pdf().tobytes()), patch(
+        "utils.disclosure.extract_pages"
+    ) as extract:
+        with pytest.raises(
+            DocumentTypeError, match="not a Loan Estimate; use parse_cd_to_mismo_json"
+        ):
+            parse_le_to_mismo({"pdf_url": "https://example.com/cd.pdf"})
+    extract.assert_not_called()
+
+
+def test_identify_document_tool(test_client):
+    with patch("tools.identify_document.fetch_pdf", return_value=cd_pdf().tobytes()):
+        response = test_client.post(
+            "/call",
+            json={
+                "tool": "identify_document",
+                "input": {"pdf_url": "https://example.com/cd.pdf"},
+            },
+        )
+    output = response.json()["output"]
+    assert output["route"] == "parse_cd_to_mismo_json"
+    assert output["error"] is None
+
+    with patch(
+        "tools.identify_document.fetch_pdf",
+        return_value=make_pdf(2, "Invoice").tobytes(),
+    ):
+        output = identify_document({"pdf_url": "https://example.com/invoice.pdf"})
+    assert output["route"] is None
+    assert output["error"] == "PDF is not a TRID Loan Estimate or Closing Disclosure"
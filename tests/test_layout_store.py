@@ -0,0 +1,110 @@
+import multiprocessing
+from unittest.mock import patch
+
+import pymupdf
+import numpy as np
+import pytest
+
+from tools.get_document_layout import get_document_layout
+from utils.layout_store import CODEC_ZLIB, LayoutStore, document_hash, page_layout
+from utils.pdf_utils import extract_pages
+
+WORDS = [
+    (72.0, 60.5, 150.25, 72.0, "Closing", 0, 0, 0),
+    (152.0, 60.5, 230.0, 72.0, "Disclosure", 0, 0, 1),
+    (72.0, 90.0, 110.0, 102.0, "Prêt", 1, 0, 0),
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LayoutStore(str(tmp_path / "layout"), codec=CODEC_ZLIB)
+
+
+def test_round_trip_views_columns(store):
+    store.put(
+        "ab" * 32,
+        5,
+        {1: page_layout("Closing Disclosure\nPrêt\n", WORDS), 3: page_layout("", [])},
+    )
+    document = store.open("ab" * 32)
+    assert (document.page_count, document.pages()) == (5, [1, 3])
+
+    page = document.page(1)
+    assert page.text == "Closing Disclosure\nPrêt\n"
+    assert page.words == ["Closing", "Disclosure", "Prêt"]
+    assert page.boxes.dtype == np.float32 and page.boxes.shape == (3, 4)
+    assert page.boxes[0].tolist() == [72.0, 60.5, 150.25, 72.0]
+    assert page.positions[2].tolist() == [1, 0, 0]
+    # Columns are views over the decompressed frame, not copies
+    assert not page.boxes.flags.owndata
+    assert document.page(3).words == []
+    assert document.page(2) is None and document.page(9) is None
+
+
+def test_put_merges_pages(store):
+    store.put("cd" * 32, 5, {1: page_layout("one", WORDS[:1])})
+    store.put("cd" * 32, 5, {5: page_layout("five", WORDS[1:])})
+    document = store.open("cd" * 32)
+    assert document.pages() == [1, 5]
+    assert document.page(1).text == "one"
+    assert document.page(5).words == ["Disclosure", "Prêt"]
+
+
+def test_frames_are_compressed(store):
+    words = [
+        (float(n), 0.0, float(n) + 5, 10.0, "Amount", 0, n // 10, n % 10)
+        for n in range(2000)
+    ]
+    store.put("ef" * 32, 1, {1: page_layout("Amount " * 2000, words)})
+    raw_size = int(store.open("ef" * 32)._table["size"][0])
+    with open(store.path("ef" * 32), "rb") as f:
+        assert len(f.read()) < raw_size / 4
+
+
+def test_extracted_pages_are_served_without_pymupdf(store):
+    doc = pymupdf.open()
+    doc.new_page().insert_text((72, 72), "Loan Amount $250,000")
+    data = doc.tobytes()
+    pages = extract_pages(pymupdf.open(stream=data, filetype="pdf"), [1])
+    store.put(document_hash(data), 1, {n: p.layout for n, p in pages.items()})
+
+    with patch("tools.get_document_layout.layout_store", store), patch(
+        "tools.get_document_layout.fetch_pdf", return_value=data
+    ):
+        output = get_document_layout({"pdf_url": "https://example.com/cd.pdf"})
+        with pytest.raises(ValueError, match="were not extracted"):
+            get_document_layout({"document_hash": document_hash(data), "pages": [2]})
+    assert output["stored_pages"] == [1]
+    assert output["pages"][0]["words"]["text"] == ["Loan", "Amount", "$250,000"]
+    assert len(output["pages"][0]["words"]["bbox"][0]) == 4
+
+
+@pytest.mark.parametrize(
+    "doc_hash", ["../../etc/passwd", "AB" * 32, "ab" * 32 + "\n", "ab" * 31]
+)
+def test_invalid_document_hash_is_rejected(store, doc_hash):
+    with patch("tools.get_document_layout.layout_store", store):
+        with pytest.raises(ValueError, match="Invalid document hash"):
+            get_document_layout({"document_hash": doc_hash})
+    with pytest.raises(ValueError, match="Invalid document hash"):
+        store.put(doc_hash, 1, {1: page_layout("", [])})
+
+
+def _put_page(root, page_number):
+    LayoutStore(root, codec=CODEC_ZLIB).put(
+        "12" * 32, 8, {page_number: page_layout(f"page {page_number}", WORDS)}
+    )
+
+
+def test_concurrent_puts_from_processes_keep_every_page(store):
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_put_page, args=(store.root, n)) for n in range(1, 9)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert [w.exitcode for w in workers] == [0] * 8
+    assert store.open("12" * 32).pages() == list(range(1, 9))
@@ -0,0 +1,293 @@
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from main import mcp_server
+from utils.admission import Overloaded
+from utils.mcp_transport import STDIO_LINE_LIMIT, MCPServer, serve_stdio
+
+TOOLS = [
+    {"name": "slow", "input_schema": {"type": "object"}},
+    {"name": "fast"},
+    {"name": "busy"},
+]
+
+
+async def run(name, arguments, client_key):
+    if name == "slow":
+        await asyncio.sleep(0.05)
+    if name == "busy":
+        raise Overloaded(name, 3)
+    if arguments.get("fail"):
+        raise ValueError("bad input")
+    return {"tool": name}
+
+
+def request(request_id, method, **params):
+    return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+
+
+@pytest.mark.asyncio
+async def test_stdio_pipelines_calls():
+    server = MCPServer("test", "1.0", lambda: TOOLS, run)
+    reader = asyncio.StreamReader()
+    for message in [
+        request(1, "tools/call", name="slow"),
+        request(2, "tools/call", name="fast"),
+        request(3, "tools/call", name="fast", arguments={"fail": True}),
+        request(4, "tools/call", name="busy"),
+        request(5, "tools/call", name="missing"),
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+    ]:
+        reader.feed_data((json.dumps(message) + "\n").encode())
+    reader.feed_data(b"{not json\n")
+    reader.feed_eof()
+    out = io.StringIO()
+    await serve_stdio(server, reader, out)
+
+    responses = [json.loads(line) for line in out.getvalue().splitlines()]
+    # The slow call was sent first but answered last
+    assert responses[-1]["id"] == 1
+    by_id = {r["id"]: r for r in responses}
+    assert by_id[1]["result"]["structuredContent"] == {"tool": "slow"}
+    assert by_id[3]["result"]["isError"] is True
+    assert by_id[4]["error"] == {
+        "code": -32000,
+        "message": "Tool busy is at capacity, retry in 3s",
+        "data": {"retry_after": 3},
+    }
+    assert by_id[5]["error"]["code"] == -32602
+    assert by_id[None]["error"]["code"] == -32700
+    assert len(responses) == 6
+    assert not server.sessions
+
+
+def test_http_session_is_keyed_on_client_address(test_client):
+    response = test_client.post(
+        "/mcp", json=request(1, "initialize"), headers={"X-API-Key": "any value"}
+    )
+    session = mcp_server.get_session(response.headers["Mcp-Session-Id"])
+    assert session.client_key == "testclient"
+
+
+def test_http_session_lifecycle(test_client):
+    response = test_client.post(
+        "/mcp", json=request(1, "initialize", protocolVersion="2024-11-05")
+    )
+    assert response.status_code == 200
+    assert response.json()["result"]["protocolVersion"] == "2024-11-05"
+    session = {"Mcp-Session-Id": response.headers["Mcp-Session-Id"]}
+
+    assert test_client.post("/mcp", json=request(2, "tools/list")).status_code == 400
+    assert (
+        test_client.post(
+            "/mcp", json=request(2, "tools/list"), headers={"Mcp-Session-Id": "unknown"}
+        ).status_code
+        == 404
+    )
+    notification = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+    assert (
+        test_client.post("/mcp", json=notification, headers=session).status_code == 202
+    )
+
+    tools = test_client.post(
+        "/mcp", json=request(2, "tools/list"), headers=session
+    ).json()["result"]["tools"]
+    names = [tool["name"] for tool in tools]
+    assert "calculate_apr" in names and "parse_cd_to_mismo_json" in names
+    assert all("inputSchema" in tool for tool in tools)
+
+    assert test_client.delete("/mcp", headers=session).status_code == 204
+    assert (
+        test_client.post("/mcp", json=request(3, "ping"), headers=session).status_code
+        == 404
+    )
+
+
+def test_http_batch_shares_call_tool_registry(test_client, mock_mismo_response):
+    session = {
+        "Mcp-Session-Id": test_client.post(
+            "/mcp", json=request(1, "initialize")
+        ).headers["Mcp-Session-Id"]
+    }
+    batch = [
+        request(2, "tools/call", name="hello", arguments={"name": "MCP"}),
+        request(
+            3,
+            "tools/call",
+            name="parse_cd_to_mismo_json",
+            arguments={"pdf_url": "https://example.com/cd.pdf", "output_format": "xml"},
+        ),
+        request(4, "resources/list"),
+    ]
+    with patch(
+        "tools.parse_cd_to_mismo.parse_cd_to_mismo", return_value=mock_mismo_response
+    ):
+        response = test_client.post("/mcp", json=batch, headers=session)
+    results = response.json()
+    assert [r["id"] for r in results] == [2, 3, 4]
+    assert results[0]["result"]["content"] == [{"type": "text", "text": "Hello, MCP!"}]
+    assert results[1]["result"]["content"][0]["text"].startswith("<?xml")
+    assert results[2]["error"]["code"] == -32601
+
+
+def test_http_streams_events(test_client):
+    session = {
+        "Mcp-Session-Id": test_client.post(
+            "/mcp", json=request(1, "initialize")
+        ).headers["Mcp-Session-Id"]
+    }
+    batch = [request(2, "ping"), request(3, "tools/call", name="hello", arguments={})]
+    response = test_client.post(
+        "/mcp",
+        json=batch,
+        headers={**session, "Accept": "application/json, text/event-stream"},
+    )
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        json.loads(line[len("data: ") :])
+        for line in response.text.splitlines()
+        if line.startswith("data: ")
+    ]
+    assert sorted(e["id"] for e in events) == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_stdio_accepts_large_batches():
+    loans = [
+        {
+            "loan_amount": 200000 + n,
+            "prepaid_finance_charges": 4250.75,
+            "note_rate": 6.5,
+            "term_months": 360,
+        }
+        for n in range(1000)
+    ]
+    message = json.dumps(
+        request(1, "tools/call", name="calculate_apr", arguments={"loans": loans})
+    )
+    assert len(message) > 64 * 1024
+    reader = asyncio.StreamReader(limit=STDIO_LINE_LIMIT)
+    reader.feed_data((message + "\n").encode())
+    reader.feed_eof()
+    out = io.StringIO()
+
+    async def count_loans(name, arguments, client_key):
+        return {"loans": len(arguments["loans"])}
+
+    await serve_stdio(
+        MCPServer("test", "1.0", lambda: [{"name": "calculate_apr"}], count_loans),
+        reader,
+        out,
+    )
+    (response,) = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert response["result"]["structuredContent"] == {"loans": 1000}
+
+
+@pytest.mark.asyncio
+async def test_stdio_rejects_oversized_message_and_keeps_serving():
+    server = MCPServer("test", "1.0", lambda: TOOLS, run)
+    reader = asyncio.StreamReader(limit=1024)
+    reader.feed_data(
+        (
+            json.dumps(
+                request(1, "tools/call", name="fast", arguments={"pad": "x" * 5000})
+            )
+            + "\n"
+        ).encode()
+    )
+    reader.feed_data(
+        (json.dumps(request(2, "tools/call", name="fast")) + "\n").encode()
+    )
+    reader.feed_eof()
+    out = io.StringIO()
+    await serve_stdio(server, reader, out)
+
+    responses = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert responses[0]["error"]["code"] == -32600
+    assert responses[1]["id"] == 2
+    assert responses[1]["result"]["structuredContent"] == {"tool": "fast"}
+    assert len(responses) == 2
+
+
+@pytest.mark.asyncio
+async def test_stdio_answers_non_string_method():
+    reader = asyncio.StreamReader()
+    reader.feed_data(b'{"jsonrpc": "2.0", "id": 4, "method": 5}\n')
+    reader.feed_data((json.dumps(request(5, "ping")) + "\n").encode())
+    reader.feed_eof()
+    out = io.StringIO()
+    await serve_stdio(MCPServer("test", "1.0", lambda: TOOLS, run), reader, out)
+
+    by_id = {r["id"]: r for r in map(json.loads, out.getvalue().splitlines())}
+    assert by_id[4]["error"]["code"] == -32600
+    assert by_id[5]["result"] == {}
+
+
+def test_http_rejects_invalid_messages(test_client):
+    session = {
+        "Mcp-Session-Id": test_client.post(
+            "/mcp", json=request(1, "initialize")
+        ).headers["Mcp-Session-Id"]
+    }
+    response = test_client.post(
+        "/mcp", json={"jsonrpc": "2.0", "id": 4, "method": 5}, headers=session
+    )
+    assert response.status_code == 200
+    assert response.json()["id"] == 4
+    assert response.json()["error"]["code"] == -32600
+
+    response = test_client.post("/mcp", json=[1, 2], headers=session)
+    assert response.status_code == 200
+    assert [r["error"]["code"] for r in response.json()] == [-32600, -32600]
+
+    notification = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+    response = test_client.post("/mcp", json=[notification], headers=session)
+    assert response.status_code == 202
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_claim_stdout_keeps_other_output_off_the_protocol():
+    script = "\n".join(
+        [
+            "import os",
+            "from utils.mcp_transport import claim_stdout",
+            "protocol = claim_stdout()",
+            "print('library noise')",
+            "os.write(1, b'C-level noise\\n')",
+            "protocol.write('{}\\n')",
+            "protocol.flush()",
+        ]
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+    assert result.stdout == "{}\n"
+    assert "library noise" in result.stderr
+    assert "C-level noise" in result.stderr
+
+
+def test_main_stdio_writes_only_json_rpc_to_stdout():
+    messages = [request(1, "initialize"), request(2, "tools/list")]
+    result = subprocess.run(
+        [sys.executable, "main.py", "--stdio"],
+        input="".join(json.dumps(m) + "\n" for m in messages),
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    responses = [json.loads(line) for line in result.stdout.splitlines()]
+    assert sorted(r["id"] for r in responses) == [1, 2]
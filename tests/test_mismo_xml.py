@@ -0,0 +1,96 @@
+import xml.etree.ElementTree as ET
+from unittest.mock import patch
+from utils.mismo_mappings import MISMO_NAMESPACE, XML_EXTENSION_NAMESPACE
+from utils.mismo_xml import iter_mismo_xml
+
+NS = {"m": MISMO_NAMESPACE, "x": XML_EXTENSION_NAMESPACE}
+
+
+def test_writer_yields_one_chunk_per_deal(mock_mismo_response):
+    chunks = list(
+        iter_mismo_xml([("CD", mock_mismo_response), ("LE", {"APRDelta": 0.2})])
+    )
+    assert len(chunks) == 4
+
+    root = ET.fromstring("".join(chunks))
+    deals = root.findall("m:DEAL_SETS/m:DEAL_SET/m:DEALS/m:DEAL", NS)
+    assert len(deals) == 2
+    loan = deals[0].find("m:LOANS/m:LOAN", NS)
+    assert (
+        loan.findtext(".//m:IntegratedDisclosureDocumentType", namespaces=NS)
+        == "ClosingDisclosure"
+    )
+    assert (
+        loan.findtext(
+            "m:FEE_INFORMATION/m:FEES/m:FEE/m:FEE_DETAIL/m:FeeActualTotalAmount",
+            namespaces=NS,
+        )
+        == "2500"
+    )
+    other = loan.find("m:EXTENSION/m:OTHER", NS)
+    # OTHER only holds elements from the vendor namespace
+    assert {child.tag.split("}")[0][1:] for child in other} == {XML_EXTENSION_NAMESPACE}
+    assert other.findtext("x:APR_DELTA/x:APRDeltaPercent", namespaces=NS) == "0.31"
+    assert (
+        other.findtext("x:DELIVERY_TIMELINE/x:ComplianceCheckResultType", namespaces=NS)
+        == "Pass"
+    )
+    assert (
+        other.findtext("x:ORIGINATION_CHARGE_FLAGS/x:FlagDescription", namespaces=NS)
+        == "Above typical range for 1% origination cap"
+    )
+    # Projected output only serialises the fields that were computed
+    assert deals[1].find(".//m:FEE_INFORMATION", NS) is None
+
+
+def test_writer_escapes_text():
+    output = {
+        "GFEOriginationCharges": {
+            "value": 1.0,
+            "description": "A & B <fees>",
+            "flags": [],
+        }
+    }
+    root = ET.fromstring("".join(iter_mismo_xml([("LE", output)])))
+    assert root.findtext(".//m:FeeDescription", namespaces=NS) == "A & B <fees>"
+
+
+def test_call_streams_xml(test_client, mock_mismo_response):
+    with patch(
+        "tools.parse_cd_to_mismo.parse_cd_to_mismo", return_value=mock_mismo_response
+    ):
+        response = test_client.post(
+            "/call",
+            json={
+                "tool": "parse_cd_to_mismo_json",
+                "input": {
+                    "pdf_url": "https://example.com/cd.pdf",
+                    "output_format": "xml",
+                },
+            },
+        )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/xml")
+    assert "content-length" not in response.headers
+    root = ET.fromstring(response.content)
+    assert root.findtext(".//x:APRDeltaPercent", namespaces=NS) == "0.31"
+
+
+def test_apr_check_flags_are_repeated():
+    check = {
+        "printed_apr": 6.95,
+        "recomputed_apr": 6.695,
+        "within_tolerance": False,
+        "flags": ["a", "b"],
+    }
+    root = ET.fromstring("".join(iter_mismo_xml([("CD", {"APRCheck": check})])))
+    apr_check = root.find(".//x:APR_CHECK", NS)
+    assert [e.text for e in apr_check.findall("x:FlagDescription", NS)] == ["a", "b"]
+    assert apr_check.findtext("x:APRWithinToleranceIndicator", namespaces=NS) == "false"
+
+
+def test_no_empty_flag_container():
+    output = {"GFEOriginationCharges": {"value": 1.0, "flags": []}}
+    xml = "".join(iter_mismo_xml([("LE", output)]))
+    assert "ORIGINATION_CHARGE_FLAGS" not in xml
+    assert "<EXTENSION>" not in xml
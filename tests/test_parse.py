@@ -0,0 +1,210 @@
+import pytest
+import hashlib
+import pymupdf
+from unittest.mock import MagicMock, patch
+from tools.parse_le_to_mismo import parse_le_to_mismo
+from tools.parse_cd_to_mismo import parse_cd_to_mismo
+from utils.analytics_store import ColumnarStore
+from utils.layout_store import LayoutStore
+from utils.page_cache import PageCache
+from utils.pdf_utils import PageText
+
+CD_PAGES = {
+    1: "Closing Disclosure Date Issued 3/1/2024 Closing Date 3/15/2024 "
+    "Loan Amount $250,000 Interest Rate 6.5 %",
+    2: "Loan Costs A. Origination Charges $2,875.00",
+    5: "Loan Calculations Annual Percentage Rate (APR) 6.81 %",
+}
+
+
+@pytest.fixture
+def page_cache(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.db"))
+    with patch("utils.disclosure.page_cache", cache):
+        yield cache
+
+
+@pytest.fixture
+def analytics(tmp_path):
+    store = ColumnarStore(str(tmp_path / "analytics"))
+    with patch("utils.disclosure.analytics_store", store):
+        yield store
+
+
+@pytest.fixture
+def layouts(tmp_path):
+    store = LayoutStore(str(tmp_path / "layout"))
+    with patch("utils.disclosure.layout_store", store):
+        yield store
+
+
+@pytest.fixture
+def fake_pdf(page_cache, analytics, layouts):
+    """Serve CD_PAGES through the PDF layer and record which pages were read"""
+    requested = []
+
+    def extract(doc, pages, budget=None, cache=None):
+        pages = sorted(set(pages))
+        requested.extend(pages)
+        return {
+            p: PageText(CD_PAGES[p], hashlib.sha256(CD_PAGES[p].encode()).hexdigest())
+            for p in pages
+            if p in CD_PAGES
+        }
+
+    with patch("utils.disclosure.fetch_pdf", return_value=b"%PDF"), patch(
+        "utils.disclosure.open_pdf", return_value=MagicMock(page_count=5)
+    ), patch("utils.disclosure.identify_pdf"), patch(
+        "utils.disclosure.check_document"
+    ), patch(
+        "utils.disclosure.extract_pages", side_effect=extract
+    ):
+        yield requested
+
+
+def test_parse_cd_all_fields(fake_pdf):
+    result = parse_cd_to_mismo({"pdf_url": "https://example.com/cd.pdf"})
+    assert set(result) == {
+        "GFEOriginationCharges",
+        "APRDelta",
+        "APRCheck",
+        "DeliveryTimeline",
+    }
+    assert result["GFEOriginationCharges"]["value"] == 2875.0
+    assert result["GFEOriginationCharges"]["flags"] == [
+        "Above typical range for 1% origination cap"
+    ]
+    assert result["APRDelta"] == 0.31
+    assert result["APRCheck"]["printed_apr"] == 6.81
+    assert result["APRCheck"]["flags"] == [
+        "Loan terms or Amount Financed not found; APR not recomputed"
+    ]
+    assert result["DeliveryTimeline"] == {
+        "received_by_borrower": "2024-03-05",
+        "days_to_close": 10,
+        "compliance_check": "Pass",
+    }
+    assert fake_pdf == [1, 2, 5]
+
+
+def test_parse_cd_projection_reads_only_needed_pages(fake_pdf):
+    result = parse_cd_to_mismo(
+        {"pdf_url": "https://example.com/cd.pdf", "fields": ["DeliveryTimeline"]}
+    )
+    assert list(result) == ["DeliveryTimeline"]
+    assert fake_pdf == [1]
+
+
+def test_parse_le_projection_single_field(fake_pdf):
+    result = parse_le_to_mismo(
+        {"pdf_url": "https://example.com/le.pdf", "fields": "GFEOriginationCharges"}
+    )
+    assert list(result) == ["GFEOriginationCharges"]
+    assert result["GFEOriginationCharges"]["source_location"] == "Page 2, Section A"
+    assert fake_pdf == [1, 2]
+
+
+def test_parse_unknown_field(fake_pdf):
+    with pytest.raises(ValueError, match="Unknown MISMO field"):
+        parse_cd_to_mismo(
+            {"pdf_url": "https://example.com/cd.pdf", "fields": ["LoanAmount"]}
+        )
+    assert fake_pdf == []
+
+
+def make_cd(pages, indirect_contents=False):
+    doc = pymupdf.open()
+    for page_number in range(1, 6):
+        page = doc.new_page()
+        if page_number in pages:
+            page.insert_text((72, 72), pages[page_number])
+        if indirect_contents:
+            # /Contents 7 0 R where object 7 is the array [6 0 R]
+            array = doc.get_new_xref()
+            refs = " ".join(f"{xref} 0 R" for xref in page.get_contents())
+            doc.update_object(array, f"[{refs}]")
+            doc.xref_set_key(page.xref, "Contents", f"{array} 0 R")
+    return doc.tobytes()
+
+
+@pytest.mark.parametrize("indirect_contents", [False, True])
+def test_revised_cd_only_extracts_changed_pages(
+    page_cache, analytics, layouts, indirect_contents
+):
+    load_page = pymupdf.Document.load_page
+    url = {"pdf_url": "https://example.com/cd.pdf"}
+    # Identification reads page 1's header on every call; only field extraction is under test here
+    with patch("utils.disclosure.identify_pdf"), patch(
+        "utils.disclosure.check_document"
+    ):
+        with patch(
+            "utils.disclosure.fetch_pdf",
+            return_value=make_cd(CD_PAGES, indirect_contents),
+        ):
+            parse_cd_to_mismo(url)
+
+        revised = {**CD_PAGES, 2: "Loan Costs A. Origination Charges $2,100.00"}
+        with patch(
+            "utils.disclosure.fetch_pdf",
+            return_value=make_cd(revised, indirect_contents),
+        ), patch.object(
+            pymupdf.Document, "load_page", autospec=True, side_effect=load_page
+        ) as load:
+            result = parse_cd_to_mismo(url)
+
+    assert [call.args[1] for call in load.call_args_list] == [1]
+    assert result["GFEOriginationCharges"]["value"] == 2100.0
+    assert result["GFEOriginationCharges"]["flags"] == []
+    assert result["APRDelta"] == 0.31
+
+
+def test_parse_results_are_recorded_for_analytics(fake_pdf, analytics):
+    parse_cd_to_mismo({"pdf_url": "https://example.com/cd.pdf", "lender": "Acme Bank"})
+    parse_cd_to_mismo({"pdf_url": "https://example.com/cd.pdf", "fields": ["APRDelta"]})
+
+    result = analytics.query(
+        filters=[{"column": "apr_delta", "op": ">", "value": 0.25}],
+        group_by="lender",
+        metrics=[{"op": "count"}, {"op": "max", "column": "origination_charges"}],
+    )
+    assert result["rows_scanned"] == 2
+    assert result["groups"] == [
+        {"count": 1, "lender": None, "max_origination_charges": None},
+        {"count": 1, "lender": "Acme Bank", "max_origination_charges": 2875.0},
+    ]
+
+
+def test_cd_apr_is_checked_not_invented(fake_pdf):
+    fields = {
+        "pdf_url": "https://example.com/cd.pdf",
+        "fields": ["APRDelta", "APRCheck"],
+    }
+    pages = {
+        1: CD_PAGES[1] + " Loan Term 30 years",
+        5: "Loan Calculations Amount Financed $245,000.00",
+    }
+    with patch.dict(CD_PAGES, pages):
+        result = parse_cd_to_mismo(fields)
+    # An unreadable APR leaves APRDelta empty; the recomputed value is only reported as such
+    assert result["APRDelta"] is None
+    assert result["APRCheck"]["recomputed_apr"] == 6.695
+    assert result["APRCheck"]["within_tolerance"] is None
+    assert result["APRCheck"]["flags"] == ["APR not found"]
+
+    with patch.dict(
+        CD_PAGES, {**pages, 5: pages[5] + " Annual Percentage Rate (APR) 6.95 %"}
+    ):
+        result = parse_cd_to_mismo(fields)
+    assert result["APRDelta"] == 0.45
+    assert result["APRCheck"]["difference"] == 0.255
+    assert result["APRCheck"]["within_tolerance"] is False
+    assert result["APRCheck"]["flags"] == [
+        "Printed APR differs from the recomputed APR by 0.255 points (tolerance 0.125)"
+    ]
+
+
+def test_parse_stores_page_layout(fake_pdf, layouts):
+    parse_cd_to_mismo({"pdf_url": "https://example.com/cd.pdf", "fields": ["APRDelta"]})
+    document = layouts.open(hashlib.sha256(b"%PDF").hexdigest())
+    assert document.pages() == [1, 5]
+    assert document.page(5).text == CD_PAGES[5]
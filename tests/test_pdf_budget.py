@@ -0,0 +1,94 @@
+from unittest.mock import MagicMock, patch
+
+import pymupdf
+import pytest
+
+from utils.metrics import metrics
+from utils.pdf_utils import PDFBudgetError, RequestBudget, extract_pages, fetch_pdf
+
+
+def make_doc(page_count):
+    doc = pymupdf.open()
+    for n in range(page_count):
+        doc.new_page().insert_text((72, 72), f"Page {n + 1}")
+    return doc
+
+
+def test_extract_pages_within_budget():
+    budget = RequestBudget(max_pages=5)
+    pages = extract_pages(make_doc(3), [1, 3, 9], budget)
+    assert set(pages) == {1, 3}
+    assert "Page 3" in pages[3].text
+    assert budget.pages_read == 2
+
+
+def test_page_budget_rejects():
+    with pytest.raises(PDFBudgetError, match="10 pages"):
+        extract_pages(make_doc(10), [1], RequestBudget(max_pages=4))
+
+
+def test_page_budget_truncates():
+    pages = extract_pages(
+        make_doc(10), [1, 2, 8], RequestBudget(max_pages=4, mode="truncate")
+    )
+    assert set(pages) == {1, 2}
+
+
+def test_request_memory_growth_rejects():
+    with patch("utils.pdf_utils.current_rss_mb", side_effect=[500, 520, 700]):
+        budget = RequestBudget(memory_mb=100, process_limit_mb=4096)
+        with pytest.raises(PDFBudgetError, match="by 200 MiB, exceeding the 100 MiB"):
+            extract_pages(make_doc(2), [1, 2], budget)
+    assert budget.peak_growth_mb == 200
+
+
+def test_large_worker_still_serves_small_requests():
+    # RSS left high by an earlier request is this request's baseline, not its growth
+    with patch("utils.pdf_utils.current_rss_mb", return_value=900):
+        budget = RequestBudget(memory_mb=100, process_limit_mb=1024)
+        assert set(extract_pages(make_doc(2), [1, 2], budget)) == {1, 2}
+
+
+def test_process_limit_collects_before_rejecting():
+    with patch("utils.pdf_utils.current_rss_mb", side_effect=[1000, 1030, 1010]):
+        budget = RequestBudget(memory_mb=100, process_limit_mb=1024)
+        with patch("utils.pdf_utils.gc.collect") as collect:
+            extract_pages(make_doc(1), [1], budget)
+    collect.assert_called_once()
+
+    with patch("utils.pdf_utils.current_rss_mb", side_effect=[1000, 1030, 1030]):
+        budget = RequestBudget(memory_mb=100, process_limit_mb=1024)
+        with pytest.raises(PDFBudgetError, match="needs recycling"):
+            extract_pages(make_doc(1), [1], budget)
+    assert budget.process_peak_mb == 1030
+
+
+def test_download_size_budget():
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.iter_content.return_value = [b"x" * 2**19] * 3
+    with patch("utils.pdf_utils.requests.get", return_value=response):
+        with pytest.raises(PDFBudgetError, match="1 MiB"):
+            fetch_pdf("https://example.com/big.pdf", budget=RequestBudget(max_mb=1))
+        assert (
+            fetch_pdf("https://example.com/ok.pdf", budget=RequestBudget(max_mb=2))
+            == b"x" * 3 * 2**19
+        )
+
+
+def test_download_rejections_are_reported(test_client):
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.iter_content.return_value = [b"x" * 2**19] * 3
+    before = metrics.snapshot()["counters"].get("pdf_documents", 0)
+    with patch("utils.pdf_utils.requests.get", return_value=response):
+        with pytest.raises(PDFBudgetError):
+            with RequestBudget(max_mb=1) as budget:
+                fetch_pdf("https://example.com/big.pdf", budget=budget)
+    assert budget.download_bytes > 2**20
+
+    snapshot = test_client.get("/metrics").json()
+    assert snapshot["counters"]["pdf_documents"] == before + 1
+    assert snapshot["gauges"]["pdf_last_download_mb"] == 1.5
+    assert "pdf_max_request_growth_mb" in snapshot["gauges"]
+    assert snapshot["gauges"]["process_rss_mb"] > 0
@@ -0,0 +1,15 @@
+"""
+calculate_apr tool: Regulation Z Appendix J APR for a batch of loans.
+"""
+
+from typing import Any, Dict
+
+from utils.apr import calculate_aprs
+
+
+def calculate_apr(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Solve the APR for every loan together with the vectorized Appendix J engine"""
+    loans = input_data.get("loans")
+    if not loans:
+        raise ValueError("loans must contain at least one loan")
+    return {"loans": calculate_aprs(loans)}
@@ -0,0 +1,21 @@
+"""
+check_delivery_timeline tool: TRID delivery and waiting-period checks for a batch of loans.
+"""
+
+from typing import Any, Dict
+
+from utils.business_days import timeline_records
+
+
+def check_delivery_timeline(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute DeliveryTimeline for every loan in one vectorized pass over the business-day calendar"""
+    form = input_data.get("form", "CD")
+    loans = input_data.get("loans")
+    if not loans:
+        raise ValueError("loans must contain at least one loan")
+    timelines = timeline_records(
+        form,
+        [loan.get("date_issued") for loan in loans],
+        [loan.get("closing_date") for loan in loans],
+    )
+    return {"form": form, "timelines": timelines}
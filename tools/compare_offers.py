@@ -0,0 +1,16 @@
+"""
+compare_offers tool: side-by-side cost comparison of Loan Estimate offers.
+"""
+
+from typing import Any, Dict
+
+from utils.comparison import DEFAULT_HORIZONS, compare_offers as compare
+
+
+def compare_offers(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Total cost per holding horizon, points-vs-rate break-even and amortization for every offer"""
+    return compare(
+        input_data.get("offers") or [],
+        horizons=input_data.get("horizons") or DEFAULT_HORIZONS,
+        include_schedule=input_data.get("include_schedule", True),
+    )
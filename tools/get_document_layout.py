@@ -0,0 +1,61 @@
+"""
+get_document_layout tool: stored page text and word boxes for a previously parsed document.
+"""
+
+from typing import Any, Dict
+
+import numpy as np
+
+from utils.layout_store import document_hash, layout_store
+from utils.pdf_utils import RequestBudget, fetch_pdf
+
+
+def get_document_layout(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Read pages from the layout store instead of re-opening the PDF
+
+    Documents are looked up by `document_hash` (SHA-256 of the PDF bytes) or by
+    `pdf_url`, which is downloaded and hashed but never parsed.
+    """
+    doc_hash = input_data.get("document_hash")
+    if not doc_hash:
+        if not input_data.get("pdf_url"):
+            raise ValueError("document_hash or pdf_url is required")
+        with RequestBudget() as budget:
+            doc_hash = document_hash(fetch_pdf(input_data["pdf_url"], budget=budget))
+    document = layout_store.open(doc_hash)
+    if document is None:
+        raise ValueError(f"No stored layout for document {doc_hash}; parse it first")
+
+    stored = document.pages()
+    requested = input_data.get("pages") or stored
+    missing = sorted(set(requested) - set(stored))
+    if missing:
+        raise ValueError(
+            f"Pages {missing} of document {doc_hash} were not extracted; stored pages: {stored}"
+        )
+
+    include_words = input_data.get("include_words", True)
+    pages = []
+    for page_number in requested:
+        layout = document.page(page_number)
+        page = {
+            "page": page_number,
+            "text": layout.text,
+            "word_count": len(layout.words),
+        }
+        if include_words:
+            # Columnar, like the store itself: one list per attribute
+            page["words"] = {
+                "text": layout.words,
+                "bbox": np.round(layout.boxes.astype(float), 2).tolist(),
+                "block": layout.positions[:, 0].tolist(),
+                "line": layout.positions[:, 1].tolist(),
+                "word": layout.positions[:, 2].tolist(),
+            }
+        pages.append(page)
+    return {
+        "document_hash": doc_hash,
+        "page_count": document.page_count,
+        "stored_pages": stored,
+        "pages": pages,
+    }
@@ -0,0 +1,21 @@
+"""
+identify_document tool: classify a PDF as a Loan Estimate, Closing Disclosure or neither.
+"""
+
+from typing import Any, Dict
+
+from utils.document_id import identify_pdf, identity_record
+from utils.pdf_utils import RequestBudget, fetch_pdf, open_pdf
+
+
+def identify_document(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Fingerprint a PDF's first page and page count and name the parse tool to route it to"""
+    pdf_url = input_data.get("pdf_url")
+    if not pdf_url:
+        raise ValueError("pdf_url is required")
+    with RequestBudget() as budget:
+        doc = open_pdf(fetch_pdf(pdf_url, budget=budget))
+        try:
+            return identity_record(identify_pdf(doc))
+        finally:
+            doc.close()
@@ -0,0 +1,12 @@
+"""
+parse_cd_to_mismo_json tool: Closing Disclosure PDF to MISMO-compliant JSON.
+"""
+
+from typing import Any, Dict
+
+from utils.disclosure import parse_disclosure
+
+
+def parse_cd_to_mismo(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse a Closing Disclosure, computing only the MISMO `fields` requested (all by default)"""
+    return parse_disclosure(input_data, "CD")
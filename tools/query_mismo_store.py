@@ -0,0 +1,16 @@
+"""
+query_mismo_store tool: filtered aggregations over every recorded parse result.
+"""
+
+from typing import Any, Dict
+
+from utils.analytics_store import analytics_store
+
+
+def query_mismo_store(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a filtered, optionally grouped aggregation over the analytics store"""
+    return analytics_store.query(
+        filters=input_data.get("filters"),
+        group_by=input_data.get("group_by"),
+        metrics=input_data.get("metrics"),
+    )
@@ -0,0 +1,143 @@
+"""
+Admission control for tool calls.
+
+slowapi caps requests per minute but not how many run at once. Each tool gets
+a gate with a concurrency limit and a bounded wait queue; when the queue is
+full the call is rejected immediately with a Retry-After estimated from recent
+service times instead of piling up inside the worker. Waiting calls are
+granted round-robin across clients (keyed by the caller, e.g. by client address)
+so one busy client cannot starve others.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+DEFAULT_MAX_CONCURRENT = int(os.getenv("TOOL_MAX_CONCURRENT", "4"))
+DEFAULT_MAX_QUEUED = int(os.getenv("TOOL_MAX_QUEUED", "16"))
+SERVICE_TIME_WINDOW = 50
+
+
+def _parse_limits(spec: str) -> Dict[str, int]:
+    """Parse "tool=limit,tool=limit" overrides"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        limits[name.strip()] = int(value)
+    return limits
+
+
+# Per-tool overrides, e.g. TOOL_CONCURRENCY=parse_le_to_mismo_json=2,parse_cd_to_mismo_json=2
+TOOL_CONCURRENCY = _parse_limits(os.getenv("TOOL_CONCURRENCY", ""))
+TOOL_QUEUE_SIZE = _parse_limits(os.getenv("TOOL_QUEUE_SIZE", ""))
+
+
+class Overloaded(Exception):
+    """Raised when a tool's wait queue is full"""
+
+    def __init__(self, tool: str, retry_after: int):
+        super().__init__(f"Tool {tool} is at capacity, retry in {retry_after}s")
+        self.tool = tool
+        self.retry_after = retry_after
+
+
+class ToolGate:
+    def __init__(self, name: str, max_concurrent: int, max_queued: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.active = 0
+        self.queued = 0
+        # Waiters per client key; keys are served round-robin in insertion order
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._service_times: Deque[float] = deque(maxlen=SERVICE_TIME_WINDOW)
+
+    def retry_after(self) -> int:
+        """Seconds until a new call would likely be admitted"""
+        if not self._service_times:
+            return 1
+        mean = sum(self._service_times) / len(self._service_times)
+        return max(1, math.ceil(mean * (self.queued + 1) / self.max_concurrent))
+
+    async def _acquire(self, key: str) -> None:
+        if self.active < self.max_concurrent and not self.queued:
+            self.active += 1
+            return
+        if self.queued >= self.max_queued:
+            raise Overloaded(self.name, self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(waiter)
+        self.queued += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the caller went away
+                self._release()
+            else:
+                self._remove(key, waiter)
+            raise
+
+    def _remove(self, key: str, waiter: asyncio.Future) -> None:
+        queue = self._waiters.get(key)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            self.queued -= 1
+            if not queue:
+                del self._waiters[key]
+
+    def _release(self) -> None:
+        while self._waiters:
+            key, queue = next(iter(self._waiters.items()))
+            waiter = queue.popleft()
+            self.queued -= 1
+            # Rotate the key to the back so the next grant goes to another client
+            del self._waiters[key]
+            if queue:
+                self._waiters[key] = queue
+            if not waiter.done():
+                # Hand the slot over directly; `active` stays the same
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, key: str):
+        await self._acquire(key)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_times.append(time.monotonic() - start)
+            self._release()
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self._gates: Dict[str, ToolGate] = {}
+
+    def gate(self, tool: str) -> ToolGate:
+        if tool not in self._gates:
+            self._gates[tool] = ToolGate(
+                tool,
+                TOOL_CONCURRENCY.get(tool, self.max_concurrent),
+                TOOL_QUEUE_SIZE.get(tool, self.max_queued),
+            )
+        return self._gates[tool]
+
+    def slot(self, tool: str, key: Optional[str]):
+        return self.gate(tool).slot(key or "anonymous")
+
+
+admission = AdmissionController()
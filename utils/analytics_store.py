@@ -0,0 +1,268 @@
+"""
+Columnar analytics store over parsed MISMO outputs.
+
+Every parse result is appended as one row. Each column lives in its own flat
+binary file and is memory-mapped with NumPy on read, so portfolio questions
+("all CDs with APRDelta > 0.25", "origination charges above the 1% cap by
+lender") are answered with vectorized scans instead of re-parsing documents
+or walking JSON blobs.
+
+String columns are dictionary-encoded as int32 codes (-1 when missing) and
+flags are stored as a uint64 bitmask, one bit per distinct flag string.
+"""
+
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+NUMERIC_COLUMNS = {
+    "origination_charges": np.dtype("f8"),
+    "apr_delta": np.dtype("f8"),
+    "days_to_close": np.dtype("f8"),
+    "received_by_borrower": np.dtype("M8[D]"),
+    "parsed_at": np.dtype("M8[s]"),
+}
+DICTIONARY_COLUMNS = ("form", "lender", "tolerance_bucket", "compliance_check")
+FLAGS_COLUMN = "flags"
+MAX_FLAGS = 64
+
+COLUMN_DTYPES = dict(NUMERIC_COLUMNS)
+COLUMN_DTYPES.update({name: np.dtype("i4") for name in DICTIONARY_COLUMNS})
+COLUMN_DTYPES[FLAGS_COLUMN] = np.dtype("u8")
+
+AGGREGATIONS = ("count", "sum", "mean", "min", "max")
+COMPARISONS = {
+    "==": np.equal,
+    "!=": np.not_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+}
+
+
+def record_from_output(
+    form: str, output: Dict[str, Any], input_data: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Flatten a parse result (possibly projected to a subset of fields) into one row"""
+    charges = output.get("GFEOriginationCharges") or {}
+    timeline = output.get("DeliveryTimeline") or {}
+    return {
+        "form": form,
+        "lender": input_data.get("lender"),
+        "origination_charges": charges.get("value"),
+        "tolerance_bucket": charges.get("tolerance_bucket"),
+        "flags": charges.get("flags") or [],
+        "apr_delta": output.get("APRDelta"),
+        "received_by_borrower": timeline.get("received_by_borrower"),
+        "days_to_close": timeline.get("days_to_close"),
+        "compliance_check": timeline.get("compliance_check"),
+        "parsed_at": datetime.now(timezone.utc)
+        .replace(tzinfo=None)
+        .isoformat(timespec="seconds"),
+    }
+
+
+class ColumnarStore:
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._path("store.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> Dict[str, Any]:
+        try:
+            with open(self._path("meta.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {
+                "rows": 0,
+                "dictionaries": {name: [] for name in DICTIONARY_COLUMNS},
+                "flags": [],
+            }
+
+    def _write_meta(self, meta: Dict[str, Any]) -> None:
+        tmp = self._path("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path("meta.json"))
+
+    def _encode(
+        self, meta: Dict[str, Any], record: Dict[str, Any]
+    ) -> Dict[str, np.ndarray]:
+        encoded = {}
+        for name, dtype in NUMERIC_COLUMNS.items():
+            value = record.get(name)
+            missing = np.datetime64("NaT") if dtype.kind == "M" else np.nan
+            encoded[name] = np.array([missing if value is None else value], dtype=dtype)
+        for name in DICTIONARY_COLUMNS:
+            value = record.get(name)
+            values = meta["dictionaries"][name]
+            if value is not None and value not in values:
+                values.append(value)
+            encoded[name] = np.array(
+                [-1 if value is None else values.index(value)], dtype="i4"
+            )
+        mask = 0
+        for flag in record.get(FLAGS_COLUMN, []):
+            if flag not in meta["flags"]:
+                if len(meta["flags"]) == MAX_FLAGS:
+                    raise ValueError(
+                        f"Analytics store supports at most {MAX_FLAGS} distinct flags"
+                    )
+                meta["flags"].append(flag)
+            mask |= 1 << meta["flags"].index(flag)
+        encoded[FLAGS_COLUMN] = np.array([mask], dtype="u8")
+        return encoded
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one row; column files past the committed row count are overwritten"""
+        with self._locked():
+            meta = self._read_meta()
+            encoded = self._encode(meta, record)
+            rows = meta["rows"]
+            for name, values in encoded.items():
+                path = self._path(f"{name}.bin")
+                with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+                    f.seek(rows * values.itemsize)
+                    f.write(values.tobytes())
+                    f.truncate()
+            meta["rows"] = rows + 1
+            self._write_meta(meta)
+
+    def load(self):
+        """Committed row count, metadata and read-only memory maps of every column"""
+        meta = self._read_meta()
+        rows = meta["rows"]
+        columns = {}
+        for name, dtype in COLUMN_DTYPES.items():
+            if rows:
+                columns[name] = np.memmap(
+                    self._path(f"{name}.bin"), dtype=dtype, mode="r", shape=(rows,)
+                )
+            else:
+                columns[name] = np.empty(0, dtype=dtype)
+        return meta, columns
+
+    def _filter_mask(self, meta, columns, flt: Dict[str, Any]) -> np.ndarray:
+        name, op, value = flt.get("column"), flt.get("op", "=="), flt.get("value")
+        if name not in COLUMN_DTYPES:
+            raise ValueError(f"Unknown column: {name}")
+        column = columns[name]
+        if name == FLAGS_COLUMN:
+            if op != "has":
+                raise ValueError("flags only supports the 'has' operator")
+            if value not in meta["flags"]:
+                return np.zeros(len(column), dtype=bool)
+            return (column & np.uint64(1 << meta["flags"].index(value))) != 0
+        if name in DICTIONARY_COLUMNS:
+            values = meta["dictionaries"][name]
+            if op == "in":
+                codes = [values.index(v) for v in value if v in values]
+                return np.isin(column, codes)
+            if op not in ("==", "!="):
+                raise ValueError(f"{name} only supports '==', '!=' and 'in'")
+            code = values.index(value) if value in values else -2
+            return COMPARISONS[op](column, code)
+        if op == "in":
+            return np.isin(column, np.array(value, dtype=column.dtype))
+        if op not in COMPARISONS:
+            raise ValueError(f"Unknown operator: {op}")
+        return COMPARISONS[op](column, np.array(value, dtype=column.dtype))
+
+    def query(
+        self,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        group_by: Optional[str] = None,
+        metrics: Optional[List[Dict[str, str]]] = None,
+    ) -> Dict[str, Any]:
+        """Filtered (optionally grouped) aggregations over the whole store"""
+        meta, columns = self.load()
+        metrics = metrics or [{"op": "count"}]
+        if group_by is not None and group_by not in DICTIONARY_COLUMNS:
+            raise ValueError(
+                f"group_by must be one of: {', '.join(DICTIONARY_COLUMNS)}"
+            )
+
+        mask = np.ones(meta["rows"], dtype=bool)
+        for flt in filters or []:
+            mask &= self._filter_mask(meta, columns, flt)
+
+        # Gathering by index is several times faster than boolean-mask selection
+        selected = np.flatnonzero(mask)
+        if group_by is None:
+            groups = np.zeros(len(selected), dtype=np.intp)
+            keys = [None]
+        else:
+            # Shift codes by one so missing values (-1) form their own group
+            groups = columns[group_by].take(selected).astype(np.intp) + 1
+            keys = [None] + meta["dictionaries"][group_by]
+
+        n_groups = len(keys)
+        result_columns = {"count": np.bincount(groups, minlength=n_groups)}
+        for metric in metrics:
+            op, name = metric.get("op"), metric.get("column")
+            if op not in AGGREGATIONS:
+                raise ValueError(f"Unknown aggregation: {op}")
+            if op == "count":
+                continue
+            if name not in NUMERIC_COLUMNS or NUMERIC_COLUMNS[name].kind != "f":
+                raise ValueError(f"{op} requires a numeric column")
+            result_columns[f"{op}_{name}"] = _aggregate(
+                op, columns[name].take(selected), groups, n_groups
+            )
+
+        present = np.flatnonzero(result_columns["count"])
+        rows = []
+        for g in present:
+            row = {"count": int(result_columns["count"][g])}
+            if group_by is not None:
+                row[group_by] = keys[g]
+            for key, values in result_columns.items():
+                if key != "count":
+                    row[key] = None if np.isnan(values[g]) else float(values[g])
+            rows.append(row)
+        return {
+            "rows_scanned": meta["rows"],
+            "rows_matched": len(selected),
+            "groups": rows,
+        }
+
+
+def _aggregate(
+    op: str, values: np.ndarray, groups: np.ndarray, n_groups: int
+) -> np.ndarray:
+    """Per-group aggregation of one float column, ignoring NaN"""
+    missing = np.isnan(values)
+    if missing.any():
+        values, groups = values[~missing], groups[~missing]
+    counts = np.bincount(groups, minlength=n_groups)
+    if op in ("sum", "mean"):
+        sums = np.bincount(groups, weights=values, minlength=n_groups)
+        if op == "sum":
+            return sums
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, np.nan)
+    out = np.full(n_groups, np.inf if op == "min" else -np.inf)
+    (np.minimum if op == "min" else np.maximum).at(out, groups, values)
+    return np.where(counts > 0, out, np.nan)
+
+
+analytics_store = ColumnarStore(
+    os.path.join(os.getenv("PDF_CACHE_DIR", "./cache"), "analytics")
+)
@@ -0,0 +1,210 @@
+"""
+Regulation Z Appendix J actuarial APR engine.
+
+Appendix J defines the APR through the general equation
+
+    A = sum_k P_k / ((1 + f * i) * (1 + i) ** t_k)
+
+where A is the amount financed, P_k the k-th payment, t_k the whole unit
+periods (months) from consummation to that payment, f the fractional unit
+period of an odd first period (odd days / 30) and i the unit-period rate.
+APR = 12 * i.
+
+`solve_apr` runs Newton's method on padded (loans x payments) NumPy arrays so
+thousands of loans are solved together; `solve_apr_scalar` is the plain
+per-loan reference it is checked and benchmarked against.
+"""
+
+import calendar
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+UNIT_PERIODS_PER_YEAR = 12
+UNIT_PERIOD_DAYS = 30
+
+# Regular transactions are accurate within 1/8 of a percentage point (12 CFR 1026.22(a)(2))
+APR_TOLERANCE = 0.125
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    return date(year, month + 1, min(day.day, calendar.monthrange(year, month + 1)[1]))
+
+
+def odd_period(consummation: date, first_payment: date) -> Tuple[int, float]:
+    """Whole unit periods and fractional unit period from consummation to the first payment
+
+    Appendix J counts full months backward from the payment date; the days left
+    over form the fractional period.
+    """
+    if first_payment <= consummation:
+        raise ValueError("first_payment_date must be after consummation_date")
+    months = (
+        (first_payment.year - consummation.year) * 12
+        + first_payment.month
+        - consummation.month
+    )
+    while _add_months(first_payment, -months) < consummation:
+        months -= 1
+    odd_days = (_add_months(first_payment, -months) - consummation).days
+    return months, odd_days / UNIT_PERIOD_DAYS
+
+
+def level_payment(principal: Any, annual_rate: Any, term_months: Any) -> np.ndarray:
+    """Fully amortizing monthly payment; rates are in percent"""
+    principal = np.asarray(principal, dtype=float)
+    rate = np.asarray(annual_rate, dtype=float) / 100 / UNIT_PERIODS_PER_YEAR
+    n = np.asarray(term_months, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payment = principal * rate / -np.expm1(-n * np.log1p(rate))
+    return np.where(rate == 0, principal / n, payment)
+
+
+def payment_matrix(
+    streams: Sequence[Sequence[Tuple[float, int]]], first_periods: Sequence[int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Pad per-loan payment streams into (loans x payments) amount and period arrays
+
+    Each stream is a list of (amount, count) runs of consecutive monthly payments;
+    the first payment falls `first_periods[loan]` whole periods after consummation.
+    """
+    counts = [sum(count for _, count in stream) for stream in streams]
+    width = max(counts) if counts else 0
+    amounts = np.zeros((len(streams), width))
+    for row, stream in enumerate(streams):
+        column = 0
+        for amount, count in stream:
+            amounts[row, column : column + count] = amount
+            column += count
+    periods = np.asarray(first_periods, dtype=float)[:, None] + np.arange(width)
+    return amounts, periods
+
+
+def solve_apr(
+    amount_financed: Any,
+    amounts: np.ndarray,
+    periods: np.ndarray,
+    odd_fraction: Any = 0.0,
+    tol: float = 1e-12,
+    max_iter: int = 50,
+) -> np.ndarray:
+    """APR in percent for every loan (row); NaN where Newton's method does not converge"""
+    A = np.asarray(amount_financed, dtype=float)
+    P = np.asarray(amounts, dtype=float)
+    t = np.asarray(periods, dtype=float)
+    f = np.broadcast_to(np.asarray(odd_fraction, dtype=float), A.shape)
+
+    # Starting point from the constant-ratio approximation,
+    # good to a few basis points for level payments
+    n = np.count_nonzero(P, axis=1)
+    i = 2 * (P.sum(axis=1) - A) / (A * (n + 1))
+    converged = np.zeros(A.shape, dtype=bool)
+    for _ in range(max_iter):
+        discount = np.exp(-t * np.log1p(i)[:, None])
+        odd = 1 + f * i
+        pv = P * discount
+        value = pv.sum(axis=1) / odd - A
+        # d/di of P / ((1 + f i)(1 + i)^t) = -P v (f / (1 + f i) + t / (1 + i))
+        slope = -(pv.sum(axis=1) * f / odd + (pv * t).sum(axis=1) / (1 + i)) / odd
+        step = value / slope
+        i = np.maximum(i - step, -0.99)
+        converged = np.abs(step) < tol
+        if converged.all():
+            break
+    return np.where(converged, i * UNIT_PERIODS_PER_YEAR * 100, np.nan)
+
+
+def solve_apr_scalar(
+    amount_financed: float,
+    amounts: Sequence[float],
+    periods: Sequence[float],
+    odd_fraction: float = 0.0,
+    tol: float = 1e-12,
+) -> float:
+    """Reference APR for one loan by bisection on the Appendix J equation"""
+
+    def present_value(i: float) -> float:
+        total = sum(p / (1 + i) ** t for p, t in zip(amounts, periods) if p)
+        return total / (1 + odd_fraction * i)
+
+    low, high = 0.0, 1.0
+    while high - low > tol:
+        mid = (low + high) / 2
+        if present_value(mid) > amount_financed:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2 * UNIT_PERIODS_PER_YEAR * 100
+
+
+def _loan_stream(loan: Dict[str, Any]) -> List[Tuple[float, int]]:
+    if loan.get("payment_streams"):
+        return [(float(s["amount"]), int(s["count"])) for s in loan["payment_streams"]]
+    term = int(loan["term_months"])
+    payment = loan.get("payment")
+    if payment is None:
+        payment = float(level_payment(loan["loan_amount"], loan["note_rate"], term))
+    return [(float(payment), term)]
+
+
+def _loan_odd_period(loan: Dict[str, Any]) -> Tuple[int, float]:
+    if loan.get("consummation_date") and loan.get("first_payment_date"):
+        return odd_period(
+            date.fromisoformat(loan["consummation_date"]),
+            date.fromisoformat(loan["first_payment_date"]),
+        )
+    # Appendix J counts whole unit periods first; only the remainder is a fractional period
+    whole, days = divmod(loan.get("odd_days", 0), UNIT_PERIOD_DAYS)
+    return 1 + int(whole), days / UNIT_PERIOD_DAYS
+
+
+def calculate_aprs(loans: Sequence[Dict[str, Any]]) -> List[Dict[str, Optional[float]]]:
+    """Amount financed, finance charge and APR for a batch of loans in one solve
+
+    The APR is None, with a flag saying why, when the solve does not converge
+    or the payments do not cover the amount financed.
+    """
+    streams, first_periods, fractions, financed = [], [], [], []
+    for loan in loans:
+        if "loan_amount" not in loan:
+            raise ValueError("Each loan needs loan_amount")
+        if not loan.get("payment_streams") and (
+            "term_months" not in loan
+            or (loan.get("payment") is None and loan.get("note_rate") is None)
+        ):
+            raise ValueError(
+                "Each loan needs payment_streams, or term_months with payment or note_rate"
+            )
+        streams.append(_loan_stream(loan))
+        whole, fraction = _loan_odd_period(loan)
+        first_periods.append(whole)
+        fractions.append(fraction)
+        financed.append(
+            float(loan["loan_amount"]) - float(loan.get("prepaid_finance_charges", 0))
+        )
+
+    amounts, periods = payment_matrix(streams, first_periods)
+    aprs = solve_apr(financed, amounts, periods, fractions)
+    results = []
+    for row, apr in enumerate(aprs.tolist()):
+        total = float(amounts[row].sum())
+        flags = []
+        if np.isnan(apr):
+            flags.append("APR did not converge")
+        elif apr < 0:
+            flags.append(
+                "Payments total less than the amount financed; the APR would be negative"
+            )
+        results.append(
+            {
+                "apr": None if flags else round(apr, 3),
+                "amount_financed": round(financed[row], 2),
+                "finance_charge": round(total - financed[row], 2),
+                "total_of_payments": round(total, 2),
+                "flags": flags,
+            }
+        )
+    return results
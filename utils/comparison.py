@@ -0,0 +1,154 @@
+"""
+Vectorized mortgage offer comparison.
+
+Amortization is computed in closed form on an (offers x months) grid: the
+balance after k payments is P(1+r)^k - A((1+r)^k - 1)/r. Cumulative cost
+(upfront costs plus interest paid), horizon totals and the points-vs-rate
+break-even month all fall out of that grid without per-month Python loops.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.apr import UNIT_PERIODS_PER_YEAR, level_payment
+
+DEFAULT_HORIZONS = (60, 84, 120, 360)
+
+
+def amortization_grid(
+    principal: Any, annual_rate: Any, term_months: Any
+) -> Dict[str, np.ndarray]:
+    """Payment, interest, principal and balance for every offer (row) and month (column)
+
+    Months after an offer's term are zero-filled so offers with different terms share one grid.
+    """
+    principal = np.asarray(principal, dtype=float)
+    rate = np.asarray(annual_rate, dtype=float) / 100 / UNIT_PERIODS_PER_YEAR
+    term = np.asarray(term_months, dtype=int)
+    payment = level_payment(principal, annual_rate, term)
+
+    months = np.arange(1, term.max() + 1)
+    active = months[None, :] <= term[:, None]
+    # Balance after k = 0..M payments; (1 + r)^k is computed through logs to stay vectorized
+    log_growth = np.log1p(rate)[:, None] * np.arange(term.max() + 1)[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        balance = (
+            principal[:, None] * np.exp(log_growth)
+            - payment[:, None] * np.expm1(log_growth) / rate[:, None]
+        )
+    zero_rate = rate == 0
+    if zero_rate.any():
+        balance[zero_rate] = principal[zero_rate, None] - payment[
+            zero_rate, None
+        ] * np.arange(term.max() + 1)
+    balance = np.clip(balance, 0, None)
+
+    interest = np.where(active, balance[:, :-1] * rate[:, None], 0.0)
+    principal_paid = np.where(active, balance[:, :-1] - balance[:, 1:], 0.0)
+    return {
+        "payment": np.where(active, interest + principal_paid, 0.0),
+        "interest": interest,
+        "principal": principal_paid,
+        "balance": np.where(active, balance[:, 1:], 0.0),
+        "monthly_payment": payment,
+    }
+
+
+def break_even_months(
+    cumulative_cost: np.ndarray, upfront: np.ndarray
+) -> List[Optional[int]]:
+    """Month at which each offer's cumulative cost drops to or below the lowest-upfront offer's
+
+    None for the baseline itself and for offers that never catch up.
+    """
+    baseline = int(np.argmin(upfront))
+    diff = cumulative_cost - cumulative_cost[baseline]
+    crossed = diff <= 0
+    first = np.argmax(crossed, axis=1)
+    never = ~crossed.any(axis=1)
+    result = []
+    for row in range(len(upfront)):
+        if row == baseline or never[row]:
+            result.append(None)
+        else:
+            result.append(int(first[row]) + 1)
+    return result
+
+
+def compare_offers(
+    offers: Sequence[Dict[str, Any]],
+    horizons: Sequence[int] = DEFAULT_HORIZONS,
+    include_schedule: bool = True,
+) -> Dict[str, Any]:
+    """Horizon costs, break-even months and amortization schedules for N offers"""
+    if not offers:
+        raise ValueError("offers must contain at least one offer")
+    for offer in offers:
+        for key in ("loan_amount", "interest_rate", "term_months"):
+            if offer.get(key) is None:
+                raise ValueError(f"Each offer needs {key}")
+    horizons = sorted({int(h) for h in horizons})
+    if not horizons or horizons[0] < 1:
+        raise ValueError("horizons must be positive month counts")
+
+    grid = amortization_grid(
+        [o["loan_amount"] for o in offers],
+        [o["interest_rate"] for o in offers],
+        [o["term_months"] for o in offers],
+    )
+    upfront = np.array(
+        [
+            o.get("closing_costs", 0)
+            + o.get("discount_points", 0)
+            - o.get("lender_credits", 0)
+            for o in offers
+        ],
+        dtype=float,
+    )
+    cumulative_interest = np.cumsum(grid["interest"], axis=1)
+    cumulative_principal = np.cumsum(grid["principal"], axis=1)
+    cumulative_cost = upfront[:, None] + cumulative_interest
+    break_even = break_even_months(cumulative_cost, upfront)
+
+    last = cumulative_cost.shape[1]
+    columns = [min(h, last) - 1 for h in horizons]
+    horizon_cost = cumulative_cost[:, columns]
+    horizon_principal = cumulative_principal[:, columns]
+    horizon_paid = (
+        upfront[:, None] + cumulative_interest[:, columns] + horizon_principal
+    )
+    cheapest = np.argmin(horizon_cost, axis=0)
+
+    results = []
+    for row, offer in enumerate(offers):
+        term = int(offer["term_months"])
+        result = {
+            "name": offer.get("name", f"Offer {row + 1}"),
+            "monthly_payment": round(float(grid["monthly_payment"][row]), 2),
+            "upfront_costs": round(float(upfront[row]), 2),
+            "break_even_month": break_even[row],
+            "horizons": [
+                {
+                    "months": h,
+                    "total_cost": round(float(horizon_cost[row, col]), 2),
+                    "total_paid": round(float(horizon_paid[row, col]), 2),
+                    "principal_paid": round(float(horizon_principal[row, col]), 2),
+                }
+                for col, h in enumerate(horizons)
+            ],
+        }
+        if include_schedule:
+            result["schedule"] = {
+                key: np.round(grid[key][row, :term], 2).tolist()
+                for key in ("payment", "interest", "principal", "balance")
+            }
+        results.append(result)
+
+    return {
+        "offers": results,
+        "cheapest_by_horizon": [
+            {"months": h, "offer": results[int(cheapest[col])]["name"]}
+            for col, h in enumerate(horizons)
+        ],
+    }
@@ -0,0 +1,185 @@
+"""
+Shared parse pipeline for the LE and CD tools.
+
+Each MISMO output field is built from a small set of raw values (see
+`utils.mismo_mappings`). The pipeline resolves the requested `fields` first and
+only reads the pages that feed them, so a caller asking for `APRDelta` alone
+never touches the Loan Costs page. Extracted page text is cached by page
+fingerprint, so a revised disclosure only extracts the pages that changed.
+"""
+
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.analytics_store import analytics_store, record_from_output
+from utils.apr import APR_TOLERANCE, calculate_aprs
+from utils.business_days import timeline_records
+from utils.document_id import FORM_FINGERPRINTS, check_document, identify_pdf
+from utils.mismo_mappings import (
+    FIELD_DESCRIPTIONS,
+    OUTPUT_FORMATS,
+    SOURCE_LOCATIONS,
+    SOURCE_PAGES,
+    convert_values,
+    match_page_values,
+    pages_for_fields,
+    raw_keys_for_fields,
+    resolve_fields,
+)
+from utils.layout_store import document_hash, layout_store, page_layout
+from utils.page_cache import page_cache
+from utils.pdf_utils import PageText, RequestBudget, extract_pages, fetch_pdf, open_pdf
+
+logger = logging.getLogger(__name__)
+
+ORIGINATION_CAP_PERCENT = 1.0
+APR_CHECK_BASIS = "Level payments at the note rate; mortgage insurance and ARM or step payments are not modelled"
+
+
+def build_origination_charges(form: str, raw: Dict[str, Any]) -> Dict[str, Any]:
+    charges = raw.get("origination_charges")
+    loan_amount = raw.get("loan_amount")
+    flags = []
+    if charges is None:
+        flags.append("Origination charges not found")
+    elif loan_amount and charges > loan_amount * ORIGINATION_CAP_PERCENT / 100:
+        flags.append("Above typical range for 1% origination cap")
+    return {
+        "value": charges,
+        "description": FIELD_DESCRIPTIONS["GFEOriginationCharges"],
+        "flags": flags,
+        "tolerance_bucket": "Zero Tolerance",
+        "source_location": SOURCE_LOCATIONS[form]["origination_charges"],
+    }
+
+
+def recompute_apr(raw: Dict[str, Any]) -> Tuple[Optional[float], List[str]]:
+    """Appendix J APR from the printed loan terms (see APR_CHECK_BASIS) and any flags"""
+    loan_amount, rate = raw.get("loan_amount"), raw.get("interest_rate")
+    term, financed = raw.get("loan_term"), raw.get("amount_financed")
+    if None in (loan_amount, rate, term, financed):
+        return None, ["Loan terms or Amount Financed not found; APR not recomputed"]
+    loan = {
+        "loan_amount": loan_amount,
+        "note_rate": rate,
+        "term_months": term,
+        "prepaid_finance_charges": loan_amount - financed,
+    }
+    result = calculate_aprs([loan])[0]
+    return result["apr"], result["flags"]
+
+
+def build_apr_delta(form: str, raw: Dict[str, Any]) -> Optional[float]:
+    """Printed APR minus the note rate; never derived from a recomputed APR"""
+    apr, rate = raw.get("apr"), raw.get("interest_rate")
+    if apr is None or rate is None:
+        return None
+    return round(apr - rate, 3)
+
+
+def build_apr_check(form: str, raw: Dict[str, Any]) -> Dict[str, Any]:
+    printed = raw.get("apr")
+    flags = [] if printed is not None else ["APR not found"]
+    if "amount_financed" in SOURCE_PAGES[form]:
+        recomputed, recompute_flags = recompute_apr(raw)
+        flags += recompute_flags
+    else:
+        recomputed = None
+        flags.append(
+            f"Amount Financed is not disclosed on the {FORM_FINGERPRINTS[form]['name']}; APR not recomputed"
+        )
+
+    difference = within_tolerance = None
+    if printed is not None and recomputed is not None:
+        difference = round(printed - recomputed, 3)
+        within_tolerance = abs(difference) <= APR_TOLERANCE
+        if not within_tolerance:
+            flags.append(
+                f"Printed APR differs from the recomputed APR by {abs(difference)} points "
+                f"(tolerance {APR_TOLERANCE})"
+            )
+    return {
+        "printed_apr": printed,
+        "recomputed_apr": recomputed,
+        "difference": difference,
+        "within_tolerance": within_tolerance,
+        "basis": APR_CHECK_BASIS,
+        "flags": flags,
+    }
+
+
+def build_delivery_timeline(form: str, raw: Dict[str, Any]) -> Dict[str, Any]:
+    return timeline_records(form, [raw.get("date_issued")], [raw.get("closing_date")])[
+        0
+    ]
+
+
+FIELD_BUILDERS = {
+    "GFEOriginationCharges": build_origination_charges,
+    "APRDelta": build_apr_delta,
+    "APRCheck": build_apr_check,
+    "DeliveryTimeline": build_delivery_timeline,
+}
+
+
+def build_mismo_fields(
+    form: str, raw: Dict[str, Any], fields: List[str]
+) -> Dict[str, Any]:
+    return {name: FIELD_BUILDERS[name](form, raw) for name in fields}
+
+
+def match_pages(form: str, pages: Dict[int, PageText]) -> Dict[str, Optional[str]]:
+    matched = {}
+    for page_number, page in pages.items():
+        matched.update(match_page_values(form, page_number, page.text))
+    return matched
+
+
+def save_layout(doc_hash: str, page_count: int, pages: Dict[int, PageText]) -> None:
+    """Keep the extracted text and word boxes so follow-up tools need not re-open the PDF"""
+    # Like analytics, the layout store is best-effort and must never fail the parse
+    try:
+        layouts = {n: p.layout or page_layout(p.text, []) for n, p in pages.items()}
+        layout_store.put(doc_hash, page_count, layouts)
+    except Exception:
+        logger.exception("Could not store page layout for document %s", doc_hash)
+
+
+def parse_disclosure(input_data: Dict[str, Any], form: str) -> Dict[str, Any]:
+    """Parse an LE or CD PDF into the requested MISMO fields"""
+    pdf_url = input_data.get("pdf_url")
+    if not pdf_url:
+        raise ValueError("pdf_url is required")
+    fields = resolve_fields(input_data.get("fields"))
+    if input_data.get("output_format", "json") not in OUTPUT_FORMATS:
+        raise ValueError(f"output_format must be one of: {', '.join(OUTPUT_FORMATS)}")
+
+    with RequestBudget() as budget:
+        data = fetch_pdf(pdf_url, budget=budget)
+        doc = open_pdf(data)
+        try:
+            # Reject the wrong form, non-TRID PDFs and scans before any field extraction
+            check_document(identify_pdf(doc), form)
+            pages = extract_pages(
+                doc, pages_for_fields(form, fields), budget, page_cache
+            )
+            page_count = doc.page_count
+        finally:
+            doc.close()
+    save_layout(document_hash(data), page_count, pages)
+
+    raw = convert_values(match_pages(form, pages), raw_keys_for_fields(form, fields))
+    # The LE does not print a closing date; callers may supply the scheduled one
+    if "closing_date" not in SOURCE_PAGES[form] and input_data.get("closing_date"):
+        raw["closing_date"] = date.fromisoformat(input_data["closing_date"])
+    output = build_mismo_fields(form, raw, fields)
+
+    # Analytics are best-effort and must never fail the parse itself
+    try:
+        analytics_store.append(record_from_output(form, output, input_data))
+    except Exception:
+        logger.exception(
+            "Could not record %s parse result in the analytics store", form
+        )
+    return output
@@ -0,0 +1,178 @@
+"""
+Fast document-type fingerprinting for TRID disclosures.
+
+Only the first page is touched, and only its header and footer bands are
+extracted: the form title set as the header's heading, the "PAGE 1 OF N"
+footer and any H-24/H-25 model form ID, combined with the document's page
+count. The title must lead the heading because each form's header also names
+the other ("Compare this document with your Loan Estimate"), and a document
+that scores about as well for both forms is left unidentified. That is
+enough to tell a Loan Estimate from a Closing Disclosure, spot a non-TRID PDF
+or a scanned image without a text layer, and route or reject the call before
+any field extraction runs.
+"""
+
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import pymupdf
+
+from utils.pdf_utils import PDFError
+
+# Fraction of the first page's height scanned for the header and footer
+HEADER_BAND = 0.3
+FOOTER_BAND = 0.12
+# A document is identified once its best score reaches this; the title alone is enough
+MIN_SCORE = 3
+# ...and only if it leads the other form by this much; the page count alone cannot decide
+MIN_MARGIN = 2
+# Header lines within this many points of the largest font size form the heading
+HEADING_SIZE_TOLERANCE = 0.5
+
+FORM_FINGERPRINTS = {
+    "LE": {
+        "name": "Loan Estimate",
+        "title": re.compile(r"\bLoan\s+Estimate\b", re.IGNORECASE),
+        "footer": re.compile(r"LOAN\s+ESTIMATE\s+PAGE\s+1\s+OF\s+\d+", re.IGNORECASE),
+        "form_id": re.compile(r"\bH-24\b"),
+        "page_counts": (3,),
+        "tool": "parse_le_to_mismo_json",
+    },
+    "CD": {
+        "name": "Closing Disclosure",
+        "title": re.compile(r"\bClosing\s+Disclosure\b", re.IGNORECASE),
+        "footer": re.compile(
+            r"CLOSING\s+DISCLOSURE\s+PAGE\s+1\s+OF\s+\d+", re.IGNORECASE
+        ),
+        "form_id": re.compile(r"\bH-25\b"),
+        "page_counts": (5, 6),
+        "tool": "parse_cd_to_mismo_json",
+    },
+}
+
+SIGNAL_WEIGHTS = {"title": 3, "footer": 2, "form_id": 2, "page_count": 1}
+
+
+class DocumentTypeError(PDFError):
+    """Raised when a PDF is not the disclosure a parse tool expects"""
+
+
+class DocumentIdentity(NamedTuple):
+    document_type: Optional[str]
+    page_count: int
+    has_text_layer: bool
+    score: int
+    signals: List[str]
+
+
+def _band(page: pymupdf.Page, top: float, bottom: float) -> pymupdf.Rect:
+    rect = page.rect
+    return pymupdf.Rect(
+        rect.x0, rect.y0 + rect.height * top, rect.x1, rect.y0 + rect.height * bottom
+    )
+
+
+def _header_lines(page: pymupdf.Page) -> List[Tuple[float, str]]:
+    """(largest font size, text) of each line in the header band"""
+    blocks = page.get_text("dict", clip=_band(page, 0, HEADER_BAND))["blocks"]
+    return [
+        (
+            max(span["size"] for span in line["spans"]),
+            "".join(span["text"] for span in line["spans"]),
+        )
+        for block in blocks
+        if block["type"] == 0
+        for line in block["lines"]
+        if line["spans"]
+    ]
+
+
+def heading(lines: List[Tuple[float, str]]) -> str:
+    """The header's largest-type lines, where the form title is printed"""
+    if not lines:
+        return ""
+    size = max(size for size, _ in lines)
+    return "\n".join(
+        text.strip()
+        for line_size, text in lines
+        if line_size >= size - HEADING_SIZE_TOLERANCE
+    )
+
+
+def score_forms(
+    title: str, header: str, footer: str, page_count: int
+) -> Dict[str, List[str]]:
+    """Signals matched for each form; the title must start the `title` heading text"""
+    signals = {}
+    for form, fingerprint in FORM_FINGERPRINTS.items():
+        matched = []
+        if fingerprint["title"].match(title):
+            matched.append("title")
+        if fingerprint["footer"].search(footer):
+            matched.append("footer")
+        if fingerprint["form_id"].search(header) or fingerprint["form_id"].search(
+            footer
+        ):
+            matched.append("form_id")
+        if page_count in fingerprint["page_counts"]:
+            matched.append("page_count")
+        signals[form] = matched
+    return signals
+
+
+def identify_pdf(doc: pymupdf.Document) -> DocumentIdentity:
+    """Classify an open PDF from its first page's header and footer and its page count"""
+    if doc.page_count == 0:
+        return DocumentIdentity(None, 0, False, 0, [])
+    page = doc.load_page(0)
+    lines = _header_lines(page)
+    header = "\n".join(text for _, text in lines)
+    footer = page.get_text(clip=_band(page, 1 - FOOTER_BAND, 1))
+    # Only a page with nothing in either band needs the full-page check for a text layer
+    has_text = bool(header.strip() or footer.strip() or page.get_text().strip())
+    if not has_text:
+        return DocumentIdentity(None, doc.page_count, False, 0, [])
+
+    signals = score_forms(heading(lines), header, footer, doc.page_count)
+    scores = {
+        form: sum(SIGNAL_WEIGHTS[s] for s in matched)
+        for form, matched in signals.items()
+    }
+    best, runner_up = sorted(scores, key=scores.get, reverse=True)[:2]
+    if scores[best] < MIN_SCORE or scores[best] - scores[runner_up] < MIN_MARGIN:
+        return DocumentIdentity(None, doc.page_count, True, scores[best], signals[best])
+    return DocumentIdentity(best, doc.page_count, True, scores[best], signals[best])
+
+
+def identity_record(identity: DocumentIdentity) -> Dict[str, Any]:
+    """Tool output for an identified document"""
+    fingerprint = FORM_FINGERPRINTS.get(identity.document_type)
+    return {
+        "document_type": identity.document_type,
+        "document_name": fingerprint["name"] if fingerprint else None,
+        "route": fingerprint["tool"] if fingerprint else None,
+        "page_count": identity.page_count,
+        "has_text_layer": identity.has_text_layer,
+        "score": identity.score,
+        "signals": identity.signals,
+        "error": None if fingerprint else rejection_reason(identity),
+    }
+
+
+def rejection_reason(identity: DocumentIdentity) -> str:
+    if identity.page_count == 0:
+        return "PDF has no pages"
+    if not identity.has_text_layer:
+        return "PDF has no text layer (scanned image); OCR is not supported"
+    return "PDF is not a TRID Loan Estimate or Closing Disclosure"
+
+
+def check_document(identity: DocumentIdentity, form: str) -> None:
+    """Raise DocumentTypeError unless the document is the `form` disclosure"""
+    if identity.document_type is None:
+        raise DocumentTypeError(rejection_reason(identity))
+    if identity.document_type != form:
+        fingerprint = FORM_FINGERPRINTS[identity.document_type]
+        raise DocumentTypeError(
+            f"PDF is a {fingerprint['name']}, not a {FORM_FINGERPRINTS[form]['name']}; use {fingerprint['tool']}"
+        )
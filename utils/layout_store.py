@@ -0,0 +1,236 @@
+"""
+Compressed, memory-mapped store of extracted page layout, keyed by document hash.
+
+Each document is one file holding, for every page that was extracted, the
+page text and its words as columns: bounding boxes (float32 x0, y0, x1, y1),
+block/line/word numbers (uint16) and the word strings as one UTF-8 blob with
+uint32 offsets. Every page is compressed as its own frame (zstd when the
+`zstandard` package is installed, zlib otherwise), and a fixed-width page
+table at the front of the file records where each frame sits.
+
+Readers memory-map the file: the page table is viewed in place and reading a
+page decompresses only that page's frame, whose columns are then viewed with
+`np.frombuffer` rather than copied, so follow-up tools never re-open the PDF.
+"""
+
+import fcntl
+import hashlib
+import os
+import re
+import struct
+import zlib
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available
+    zstandard = None
+
+MAGIC = b"MLAY"
+FORMAT_VERSION = 1
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+
+# magic, format version, codec, page count
+HEADER = struct.Struct("<4sHHI")
+# Frame prefix: word count, page text length in bytes
+FRAME_HEADER = struct.Struct("<II")
+# SHA-256 hex digest; anything else could escape the store directory
+DOCUMENT_HASH = re.compile(r"[0-9a-f]{64}")
+PAGE_TABLE_DTYPE = np.dtype(
+    [
+        ("offset", "<u8"),
+        ("compressed_size", "<u4"),
+        ("size", "<u4"),
+        ("word_count", "<u4"),
+    ]
+)
+
+
+class PageLayout(NamedTuple):
+    text: str
+    boxes: np.ndarray  # (words, 4) float32: x0, y0, x1, y1
+    positions: np.ndarray  # (words, 3) uint16: block, line, word number
+    words: List[str]
+
+
+def document_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def page_layout(text: str, words: Sequence[Tuple]) -> PageLayout:
+    """PageLayout from a page's text and PyMuPDF `get_text("words")` tuples"""
+    boxes = np.array([w[:4] for w in words], dtype="<f4").reshape(-1, 4)
+    positions = np.array([w[5:8] for w in words], dtype="<u2").reshape(-1, 3)
+    return PageLayout(text, boxes, positions, [w[4] for w in words])
+
+
+def _compress(raw: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return zlib.compress(raw, ZLIB_LEVEL)
+
+
+def _decompress(frame: memoryview, codec: int, size: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError(
+                "Layout file is zstd-compressed but the zstandard package is not installed"
+            )
+        return zstandard.ZstdDecompressor().decompress(frame, max_output_size=size)
+    return zlib.decompress(frame)
+
+
+def encode_page(layout: PageLayout) -> bytes:
+    """Serialize one page's columns into an uncompressed frame"""
+    encoded = [word.encode("utf-8") for word in layout.words]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    np.cumsum([len(w) for w in encoded], out=offsets[1:])
+    text = layout.text.encode("utf-8")
+    return b"".join(
+        [
+            FRAME_HEADER.pack(len(encoded), len(text)),
+            np.ascontiguousarray(layout.boxes, dtype="<f4").tobytes(),
+            np.ascontiguousarray(layout.positions, dtype="<u2").tobytes(),
+            offsets.tobytes(),
+            b"".join(encoded),
+            text,
+        ]
+    )
+
+
+def decode_page(raw: bytes) -> PageLayout:
+    """View a decompressed frame's columns without copying them"""
+    count, text_size = FRAME_HEADER.unpack_from(raw)
+    at = FRAME_HEADER.size
+    boxes = np.frombuffer(raw, dtype="<f4", count=count * 4, offset=at).reshape(
+        count, 4
+    )
+    at += boxes.nbytes
+    positions = np.frombuffer(raw, dtype="<u2", count=count * 3, offset=at).reshape(
+        count, 3
+    )
+    at += positions.nbytes
+    offsets = np.frombuffer(raw, dtype="<u4", count=count + 1, offset=at).tolist()
+    at += (count + 1) * 4
+    blob = raw[at : at + offsets[-1]]
+    words = [
+        blob[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])
+    ]
+    at += offsets[-1]
+    return PageLayout(raw[at : at + text_size].decode("utf-8"), boxes, positions, words)
+
+
+class LayoutDocument:
+    """Read-only view of one stored document"""
+
+    def __init__(self, path: str):
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, self.codec, self.page_count = HEADER.unpack_from(self._data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} layout file")
+        self._table = np.frombuffer(
+            self._data,
+            dtype=PAGE_TABLE_DTYPE,
+            count=self.page_count,
+            offset=HEADER.size,
+        )
+
+    def pages(self) -> List[int]:
+        """1-based numbers of the pages stored for this document"""
+        return (np.flatnonzero(self._table["size"]) + 1).tolist()
+
+    def page(self, page_number: int) -> Optional[PageLayout]:
+        """Layout of one 1-based page, or None if it was never extracted"""
+        if not 1 <= page_number <= self.page_count:
+            return None
+        entry = self._table[page_number - 1]
+        if not entry["size"]:
+            return None
+        start = int(entry["offset"])
+        frame = memoryview(self._data)[start : start + int(entry["compressed_size"])]
+        return decode_page(_decompress(frame, self.codec, int(entry["size"])))
+
+
+class LayoutStore:
+    def __init__(self, root: str, codec: Optional[int] = None):
+        self.root = root
+        self.codec = codec or (CODEC_ZSTD if zstandard is not None else CODEC_ZLIB)
+
+    def path(self, doc_hash: str) -> str:
+        if not isinstance(doc_hash, str) or not DOCUMENT_HASH.fullmatch(doc_hash):
+            raise ValueError(
+                f"Invalid document hash {doc_hash!r}; expected a lowercase SHA-256 hex digest"
+            )
+        return os.path.join(self.root, doc_hash[:2], f"{doc_hash}.layout")
+
+    @contextmanager
+    def _locked(self):
+        # An exclusive file lock serializes read-merge-write across threads and worker processes
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, "store.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def open(self, doc_hash: str) -> Optional[LayoutDocument]:
+        path = self.path(doc_hash)
+        return LayoutDocument(path) if os.path.exists(path) else None
+
+    def put(
+        self, doc_hash: str, page_count: int, layouts: Dict[int, PageLayout]
+    ) -> None:
+        """Store page layouts, keeping pages saved earlier for the same document"""
+        with self._locked():
+            existing = self.open(doc_hash)
+            if existing is not None:
+                stored = {
+                    n: existing.page(n) for n in existing.pages() if n not in layouts
+                }
+                if not stored and set(existing.pages()) == set(layouts):
+                    return  # Same pages of an immutable document; nothing to add
+                layouts = {**stored, **layouts}
+                page_count = max(page_count, existing.page_count)
+                del existing
+            self._write(doc_hash, page_count, layouts)
+
+    def _write(
+        self, doc_hash: str, page_count: int, layouts: Dict[int, PageLayout]
+    ) -> None:
+        table = np.zeros(page_count, dtype=PAGE_TABLE_DTYPE)
+        frames = []
+        offset = HEADER.size + table.nbytes
+        for page_number in sorted(layouts):
+            raw = encode_page(layouts[page_number])
+            frame = _compress(raw, self.codec)
+            table[page_number - 1] = (
+                offset,
+                len(frame),
+                len(raw),
+                len(layouts[page_number].words),
+            )
+            frames.append(frame)
+            offset += len(frame)
+
+        path = self.path(doc_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, self.codec, page_count))
+            f.write(table.tobytes())
+            for frame in frames:
+                f.write(frame)
+        # Readers keep their mapping of the old file; new readers see the complete new one
+        os.replace(tmp, path)
+
+
+layout_store = LayoutStore(
+    os.path.join(os.getenv("PDF_CACHE_DIR", "./cache"), "layout")
+)
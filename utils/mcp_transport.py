@@ -0,0 +1,432 @@
+"""
+Native Model Context Protocol transport: JSON-RPC 2.0 over stdio and streamable HTTP.
+
+`MCPServer` implements `initialize`, `ping`, `tools/list` and `tools/call` on
+top of the same tool registry and admission gates as the REST `/call` route;
+the app supplies the tool list and an async tool runner. Requests within a
+session are pipelined: every message is dispatched as its own task and
+responses are written as they complete, so a slow PDF parse does not hold up
+a quick APR calculation sent after it.
+
+stdio carries newline-delimited messages. Streamable HTTP accepts single
+messages or batches on `POST /mcp`, keyed to a session by `Mcp-Session-Id`,
+and streams responses back as server-sent events when the client accepts them.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TextIO
+
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from utils.admission import Overloaded
+
+logger = logging.getLogger(__name__)
+
+JSONRPC_VERSION = "2.0"
+PROTOCOL_VERSIONS = ("2025-03-26", "2024-11-05")
+SESSION_HEADER = "Mcp-Session-Id"
+MAX_SESSIONS = 1024
+# Largest stdio message accepted; batch tool calls (e.g. a 1,000-loan APR run)
+# far exceed asyncio's 64 KiB default
+STDIO_LINE_LIMIT = 64 * 2**20
+
+# JSON-RPC 2.0 error codes, plus -32000 for a full admission queue
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+SERVER_OVERLOADED = -32000
+
+ToolLister = Callable[[], List[Dict[str, Any]]]
+ToolRunner = Callable[[str, Dict[str, Any], Optional[str]], Awaitable[Any]]
+
+
+class JSONRPCError(Exception):
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+def _error(
+    request_id: Any, code: int, message: str, data: Any = None
+) -> Dict[str, Any]:
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": JSONRPC_VERSION, "id": request_id, "error": error}
+
+
+def tool_descriptor(config: Dict[str, Any]) -> Dict[str, Any]:
+    """MCP tool listing entry for an mcp_config.json tool"""
+    descriptor = {
+        "name": config["name"],
+        "description": config.get("description", ""),
+        "inputSchema": config.get("input_schema", {"type": "object"}),
+    }
+    if config.get("name_for_human"):
+        descriptor["title"] = config["name_for_human"]
+    return descriptor
+
+
+def tool_result(output: Any) -> Dict[str, Any]:
+    """Wrap a tool's output as an MCP CallToolResult"""
+    if isinstance(output, str):
+        return {"content": [{"type": "text", "text": output}], "isError": False}
+    result = {
+        "content": [{"type": "text", "text": json.dumps(output)}],
+        "isError": False,
+    }
+    if isinstance(output, dict):
+        result["structuredContent"] = output
+    return result
+
+
+class LineTooLong(Exception):
+    """A stdio message exceeded the reader's line limit and was skipped"""
+
+
+def is_notification(message: Any) -> bool:
+    return (
+        isinstance(message, dict)
+        and message.get("jsonrpc") == JSONRPC_VERSION
+        and isinstance(message.get("method"), str)
+        and "id" not in message
+    )
+
+
+def is_response(message: Any) -> bool:
+    return (
+        isinstance(message, dict)
+        and message.get("jsonrpc") == JSONRPC_VERSION
+        and "method" not in message
+        and "id" in message
+        and ("result" in message or "error" in message)
+    )
+
+
+class MCPSession:
+    def __init__(self, client_key: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.client_key = client_key
+        self.protocol_version: Optional[str] = None
+        self.initialized = False
+
+
+class MCPServer:
+    def __init__(
+        self, name: str, version: str, list_tools: ToolLister, run_tool: ToolRunner
+    ):
+        self.name = name
+        self.version = version
+        self.list_tools = list_tools
+        self.run_tool = run_tool
+        self.sessions: "OrderedDict[str, MCPSession]" = OrderedDict()
+
+    def open_session(self, client_key: Optional[str] = None) -> MCPSession:
+        session = MCPSession(client_key)
+        self.sessions[session.id] = session
+        while len(self.sessions) > MAX_SESSIONS:
+            self.sessions.popitem(last=False)
+        return session
+
+    def get_session(self, session_id: str) -> Optional[MCPSession]:
+        session = self.sessions.get(session_id)
+        if session:
+            self.sessions.move_to_end(session_id)
+        return session
+
+    def close_session(self, session_id: str) -> bool:
+        return self.sessions.pop(session_id, None) is not None
+
+    async def _initialize(
+        self, params: Dict[str, Any], session: MCPSession
+    ) -> Dict[str, Any]:
+        requested = params.get("protocolVersion")
+        session.protocol_version = (
+            requested if requested in PROTOCOL_VERSIONS else PROTOCOL_VERSIONS[0]
+        )
+        return {
+            "protocolVersion": session.protocol_version,
+            "capabilities": {"tools": {"listChanged": False}},
+            "serverInfo": {"name": self.name, "version": self.version},
+        }
+
+    async def _tools_list(
+        self, params: Dict[str, Any], session: MCPSession
+    ) -> Dict[str, Any]:
+        return {"tools": [tool_descriptor(tool) for tool in self.list_tools()]}
+
+    async def _tools_call(
+        self, params: Dict[str, Any], session: MCPSession
+    ) -> Dict[str, Any]:
+        name = params.get("name")
+        arguments = params.get("arguments") or {}
+        if not any(tool["name"] == name for tool in self.list_tools()):
+            raise JSONRPCError(INVALID_PARAMS, f"Tool {name} not found")
+        if not isinstance(arguments, dict):
+            raise JSONRPCError(INVALID_PARAMS, "arguments must be an object")
+        try:
+            output = await self.run_tool(name, arguments, session.client_key)
+        except Overloaded as e:
+            raise JSONRPCError(
+                SERVER_OVERLOADED, str(e), {"retry_after": e.retry_after}
+            )
+        except Exception as e:
+            # Tool failures are reported in the result so the model can see and react to them
+            return {"content": [{"type": "text", "text": str(e)}], "isError": True}
+        return tool_result(output)
+
+    async def _ping(
+        self, params: Dict[str, Any], session: MCPSession
+    ) -> Dict[str, Any]:
+        return {}
+
+    async def handle(
+        self, message: Any, session: MCPSession
+    ) -> Optional[Dict[str, Any]]:
+        """Dispatch one JSON-RPC message; None for notifications and client responses"""
+        if not isinstance(message, dict) or message.get("jsonrpc") != JSONRPC_VERSION:
+            return _error(None, INVALID_REQUEST, "Invalid JSON-RPC 2.0 message")
+        request_id = message.get("id")
+        method = message.get("method")
+        if method is None:
+            if is_response(message):
+                # A response to a server-initiated request; this server sends none
+                return None
+            return _error(request_id, INVALID_REQUEST, "Message has no method")
+        if not isinstance(method, str):
+            return _error(request_id, INVALID_REQUEST, "method must be a string")
+        if method.startswith("notifications/"):
+            if method == "notifications/initialized":
+                session.initialized = True
+            return None
+
+        if "id" not in message:
+            return None
+        handlers = {
+            "initialize": self._initialize,
+            "ping": self._ping,
+            "tools/list": self._tools_list,
+            "tools/call": self._tools_call,
+        }
+        handler = handlers.get(method)
+        if handler is None:
+            return _error(request_id, METHOD_NOT_FOUND, f"Method {method} not found")
+        params = message.get("params") or {}
+        if not isinstance(params, dict):
+            return _error(request_id, INVALID_PARAMS, "params must be an object")
+        try:
+            result = await handler(params, session)
+        except JSONRPCError as e:
+            return _error(request_id, e.code, e.message, e.data)
+        except Exception as e:
+            logger.exception("MCP %s failed", method)
+            return _error(request_id, INTERNAL_ERROR, str(e))
+        return {"jsonrpc": JSONRPC_VERSION, "id": request_id, "result": result}
+
+    async def handle_many(
+        self, messages: List[Any], session: MCPSession
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Dispatch messages concurrently and yield their responses in completion order"""
+        tasks = [
+            asyncio.ensure_future(self.handle(message, session)) for message in messages
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                response = await finished
+                if response is not None:
+                    yield response
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def _readline(reader: asyncio.StreamReader) -> bytes:
+    """Next newline-delimited message, b"" at end of input
+
+    A line over the reader's limit is drained through its newline, so the next
+    read starts at a fresh message, and LineTooLong is raised.
+    """
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+    except asyncio.LimitOverrunError as e:
+        consumed = e.consumed
+    while True:
+        try:
+            await reader.readexactly(consumed)
+            await reader.readuntil(b"\n")
+            break
+        except asyncio.LimitOverrunError as e:
+            consumed = e.consumed
+        except asyncio.IncompleteReadError:
+            break
+    raise LineTooLong()
+
+
+def claim_stdout() -> TextIO:
+    """Reserve stdout for the stdio protocol and send everything else to stderr
+
+    File descriptor 1 is duplicated for the protocol, then fd 1 and sys.stdout
+    are pointed at stderr, so neither Python prints nor C libraries writing to
+    fd 1 can corrupt the JSON-RPC stream. Call before importing modules that
+    may print, and pass the returned stream to `serve_stdio`.
+    """
+    sys.stdout.flush()
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    return protocol
+
+
+async def serve_stdio(
+    server: MCPServer, reader: Optional[asyncio.StreamReader] = None, writer: Any = None
+) -> None:
+    """Serve one session over newline-delimited JSON-RPC on stdin/stdout
+
+    `writer` defaults to sys.stdout; a server started with `claim_stdout`
+    passes the protocol stream it returned.
+    """
+    loop = asyncio.get_running_loop()
+    if reader is None:
+        reader = asyncio.StreamReader(limit=STDIO_LINE_LIMIT)
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+        )
+    writer = writer or sys.stdout
+    session = server.open_session("stdio")
+    write_lock = asyncio.Lock()
+    pending = set()
+
+    async def send(response: Dict[str, Any]) -> None:
+        async with write_lock:
+            writer.write(json.dumps(response) + "\n")
+            writer.flush()
+
+    async def respond(message: Any) -> None:
+        if isinstance(message, list):
+            responses = [r async for r in server.handle_many(message, session)]
+            response = responses or None
+        else:
+            response = await server.handle(message, session)
+        if response is not None:
+            await send(response)
+
+    while True:
+        try:
+            line = await _readline(reader)
+        except LineTooLong:
+            # The session survives an oversized message; only that message is refused
+            await send(
+                _error(None, INVALID_REQUEST, "Message exceeds the stdio line limit")
+            )
+            continue
+        if not line:
+            break
+        if not line.strip():
+            continue
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            await send(_error(None, PARSE_ERROR, "Parse error"))
+            continue
+        # Each message runs as its own task so later requests are not blocked by earlier ones
+        task = asyncio.create_task(respond(message))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending)
+    server.close_session(session.id)
+
+
+def _sse(response: Dict[str, Any]) -> str:
+    return f"event: message\ndata: {json.dumps(response)}\n\n"
+
+
+def mcp_router(server: MCPServer, path: str = "/mcp") -> APIRouter:
+    """Streamable HTTP endpoint for `server`"""
+    router = APIRouter()
+
+    @router.post(path)
+    async def mcp_post(request: Request):
+        try:
+            payload = json.loads(await request.body())
+        except json.JSONDecodeError:
+            return JSONResponse(
+                _error(None, PARSE_ERROR, "Parse error"), status_code=400
+            )
+        batch = isinstance(payload, list)
+        messages = payload if batch else [payload]
+        if not messages:
+            return JSONResponse(
+                _error(None, INVALID_REQUEST, "Empty batch"), status_code=400
+            )
+
+        headers = {}
+        session_id = request.headers.get(SESSION_HEADER)
+        if any(
+            isinstance(m, dict) and m.get("method") == "initialize" for m in messages
+        ):
+            # Unauthenticated X-API-Key values are chosen by the client; key fairness on its address
+            client_key = request.client.host if request.client else None
+            session = server.open_session(client_key)
+            headers[SESSION_HEADER] = session.id
+        elif not session_id:
+            return JSONResponse(
+                _error(None, INVALID_REQUEST, f"Missing {SESSION_HEADER} header"),
+                status_code=400,
+            )
+        else:
+            session = server.get_session(session_id)
+            if session is None:
+                return JSONResponse(
+                    _error(None, INVALID_REQUEST, "Unknown session"), status_code=404
+                )
+
+        if all(is_notification(m) or is_response(m) for m in messages):
+            # Only notifications and responses: acknowledge without a body
+            for message in messages:
+                await server.handle(message, session)
+            return Response(status_code=202, headers=headers)
+
+        if "text/event-stream" in request.headers.get("accept", ""):
+
+            async def events():
+                async for response in server.handle_many(messages, session):
+                    yield _sse(response)
+
+            return StreamingResponse(
+                events(), media_type="text/event-stream", headers=headers
+            )
+
+        responses = [r async for r in server.handle_many(messages, session)]
+        if not batch:
+            return JSONResponse(responses[0], headers=headers)
+        # Batch responses are matched by id; keep request order for readability
+        order = {m.get("id"): n for n, m in enumerate(messages) if isinstance(m, dict)}
+        responses.sort(key=lambda r: order.get(r.get("id"), len(order)))
+        return JSONResponse(responses, headers=headers)
+
+    @router.get(path)
+    async def mcp_get():
+        # No server-initiated messages are sent, so there is no standalone event stream
+        return Response(status_code=405, headers={"Allow": "POST, DELETE"})
+
+    @router.delete(path)
+    async def mcp_delete(request: Request):
+        session_id = request.headers.get(SESSION_HEADER, "")
+        return Response(status_code=204 if server.close_session(session_id) else 404)
+
+    return router
@@ -0,0 +1,58 @@
+"""
+In-process metrics exposed on GET /metrics.
+
+Counters and gauges are kept per worker process; figures are not aggregated
+across workers.
+"""
+
+import os
+import resource
+import sys
+import threading
+from typing import Any, Dict
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MiB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._gauges: Dict[str, float] = {}
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def set(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def set_max(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = max(self._gauges.get(name, value), value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            gauges = dict(self._gauges)
+            counters = dict(self._counters)
+        gauges["process_rss_mb"] = round(current_rss_mb(), 1)
+        gauges["process_peak_rss_mb"] = round(peak_rss_mb(), 1)
+        return {"counters": counters, "gauges": gauges}
+
+
+metrics = Metrics()
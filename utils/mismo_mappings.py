@@ -0,0 +1,201 @@
+"""
+MISMO field mappings for TRID disclosures.
+
+Describes which raw values each MISMO output field is derived from and where
+those values are printed on the Loan Estimate (LE) and Closing Disclosure (CD)
+forms, so the parsers only read the pages a request actually needs.
+"""
+
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+MISMO_FIELDS = ("GFEOriginationCharges", "APRDelta", "APRCheck", "DeliveryTimeline")
+
+FIELD_DESCRIPTIONS = {
+    "GFEOriginationCharges": "Charges by lender for originating the loan",
+    "APRDelta": "Difference between the APR and the note interest rate, in percentage points",
+    "APRCheck": "Printed APR checked against the APR recomputed from the loan terms and Amount Financed",
+    "DeliveryTimeline": "Borrower receipt date and TRID waiting period check",
+}
+
+# Raw values each MISMO field is derived from
+FIELD_INPUTS = {
+    "GFEOriginationCharges": ("origination_charges", "loan_amount"),
+    "APRDelta": ("apr", "interest_rate"),
+    "APRCheck": ("apr", "interest_rate", "loan_amount", "loan_term", "amount_financed"),
+    "DeliveryTimeline": ("date_issued", "closing_date"),
+}
+
+# 1-based page on which each raw value is printed, per form
+SOURCE_PAGES = {
+    "LE": {
+        "loan_amount": 1,
+        "interest_rate": 1,
+        "date_issued": 1,
+        "origination_charges": 2,
+        "apr": 3,
+    },
+    "CD": {
+        "loan_amount": 1,
+        "interest_rate": 1,
+        "date_issued": 1,
+        "closing_date": 1,
+        "loan_term": 1,
+        "origination_charges": 2,
+        "apr": 5,
+        "amount_financed": 5,
+    },
+}
+
+SOURCE_LOCATIONS = {
+    "LE": {"origination_charges": "Page 2, Section A"},
+    "CD": {"origination_charges": "Page 2, Loan Costs Section A"},
+}
+
+_AMOUNT = r"\$\s*([\d,]+(?:\.\d{2})?)"
+_PERCENT = r"([\d]+(?:\.\d+)?)\s*%"
+_DATE = r"(\d{1,2}/\d{1,2}/\d{4})"
+
+PATTERNS = {
+    "loan_amount": re.compile(r"Loan Amount\s*" + _AMOUNT),
+    "interest_rate": re.compile(r"Interest Rate\s*" + _PERCENT),
+    "date_issued": re.compile(r"Date Issued\s*" + _DATE),
+    "closing_date": re.compile(r"Closing Date\s*" + _DATE),
+    "origination_charges": re.compile(r"A\.\s*Origination Charges\s*" + _AMOUNT),
+    "apr": re.compile(r"Annual Percentage Rate\s*\(APR\)\s*" + _PERCENT),
+    "loan_term": re.compile(r"Loan Term\s*(\d+)\s*years?"),
+    "amount_financed": re.compile(r"Amount Financed\s*" + _AMOUNT),
+}
+
+_CONVERTERS = {
+    "loan_amount": lambda s: float(s.replace(",", "")),
+    "interest_rate": float,
+    "date_issued": lambda s: datetime.strptime(s, "%m/%d/%Y").date(),
+    "closing_date": lambda s: datetime.strptime(s, "%m/%d/%Y").date(),
+    "origination_charges": lambda s: float(s.replace(",", "")),
+    "apr": float,
+    "loan_term": lambda s: int(s) * 12,
+    "amount_financed": lambda s: float(s.replace(",", "")),
+}
+
+
+def resolve_fields(fields: Optional[Union[str, Iterable[str]]]) -> List[str]:
+    """Normalise a `fields` selector into an ordered list of MISMO field names"""
+    if fields is None:
+        return list(MISMO_FIELDS)
+    if isinstance(fields, str):
+        fields = [fields]
+    requested = set(fields)
+    unknown = sorted(requested - set(MISMO_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown MISMO field(s): {', '.join(unknown)}")
+    if not requested:
+        raise ValueError("fields must name at least one MISMO field")
+    return [name for name in MISMO_FIELDS if name in requested]
+
+
+def raw_keys_for_fields(form: str, fields: Iterable[str]) -> List[str]:
+    """Raw values needed for the given MISMO fields that the form actually prints"""
+    keys = []
+    for name in fields:
+        for key in FIELD_INPUTS[name]:
+            if key in SOURCE_PAGES[form] and key not in keys:
+                keys.append(key)
+    return keys
+
+
+def pages_for_fields(form: str, fields: Iterable[str]) -> List[int]:
+    """Pages that must be read to build the given MISMO fields"""
+    return sorted(
+        {SOURCE_PAGES[form][key] for key in raw_keys_for_fields(form, fields)}
+    )
+
+
+def keys_on_page(form: str, page_number: int) -> List[str]:
+    return [key for key, page in SOURCE_PAGES[form].items() if page == page_number]
+
+
+def match_page_values(
+    form: str, page_number: int, text: str
+) -> Dict[str, Optional[str]]:
+    """Raw strings for every value the form prints on this page (None when not found)"""
+    values = {}
+    for key in keys_on_page(form, page_number):
+        match = PATTERNS[key].search(text)
+        values[key] = match.group(1) if match else None
+    return values
+
+
+def convert_values(
+    matched: Dict[str, Optional[str]], keys: Iterable[str]
+) -> Dict[str, Any]:
+    """Typed raw values for `keys`, from strings collected by `match_page_values`"""
+    return {
+        key: _CONVERTERS[key](matched[key]) if matched.get(key) else None
+        for key in keys
+    }
+
+
+# MISMO 3.x XML serialisation. Values without a MISMO data point of their own
+# (flags, source location, APRDelta, APR and TRID check results) go under the loan's
+# single EXTENSION/OTHER container; extension paths below are relative to OTHER.
+# OTHER only admits elements from a non-MISMO namespace, so they carry a vendor prefix.
+MISMO_NAMESPACE = "http://www.mismo.org/residential/2009/schemas"
+XML_EXTENSION_NAMESPACE = "https://confersolutions.ai/schemas/mismo-extension/1.0"
+XML_EXTENSION_PREFIX = "CS"
+MISMO_REFERENCE_MODEL = "3.4.0[B324]"
+OUTPUT_FORMATS = ("json", "xml")
+
+DOCUMENT_TYPES = {"LE": "LoanEstimate", "CD": "ClosingDisclosure"}
+
+# MISMO field -> (extension?, container path, [(element, output key or None for the whole value)])
+# List values are written as one element per item
+XML_MAPPINGS = {
+    "GFEOriginationCharges": (
+        False,
+        ("FEE_INFORMATION", "FEES", "FEE", "FEE_DETAIL"),
+        [
+            ("IntegratedDisclosureSectionType", "section"),
+            ("FeeActualTotalAmount", "value"),
+            ("FeeDescription", "description"),
+            ("FeeToleranceCategoryType", "tolerance_bucket"),
+        ],
+    ),
+    "APRDelta": (
+        True,
+        ("APR_DELTA",),
+        [("APRDeltaPercent", None)],
+    ),
+    "APRCheck": (
+        True,
+        ("APR_CHECK",),
+        [
+            ("PrintedAPRPercent", "printed_apr"),
+            ("RecomputedAPRPercent", "recomputed_apr"),
+            ("APRDifferencePercent", "difference"),
+            ("APRWithinToleranceIndicator", "within_tolerance"),
+            ("APRCheckBasisDescription", "basis"),
+            ("FlagDescription", "flags"),
+        ],
+    ),
+    "DeliveryTimeline": (
+        True,
+        ("DELIVERY_TIMELINE",),
+        [
+            ("ReceivedByBorrowerDate", "received_by_borrower"),
+            ("DaysToCloseCount", "days_to_close"),
+            ("ComplianceCheckResultType", "compliance_check"),
+        ],
+    ),
+}
+
+# Repeated / extension values of GFEOriginationCharges
+XML_FLAG_PATH = ("ORIGINATION_CHARGE_FLAGS",)
+XML_FLAG_ELEMENT = "FlagDescription"
+XML_SOURCE_LOCATION_ELEMENT = "SourceLocationDescription"
+
+XML_TOLERANCE_TYPES = {
+    "Zero Tolerance": "ZeroTolerance",
+    "Limited Increase": "TenPercentTolerance",
+}
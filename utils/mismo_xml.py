@@ -0,0 +1,125 @@
+"""
+Streaming MISMO 3.x XML writer.
+
+`iter_mismo_xml` is a generator that yields one chunk per document instead of
+building a DOM, so a response covering many loans is sent as chunks while
+output memory stays flat. Element names come from `XML_MAPPINGS` in
+`utils.mismo_mappings`; extension elements are written in the vendor namespace.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from utils.mismo_mappings import (
+    DOCUMENT_TYPES,
+    MISMO_FIELDS,
+    MISMO_NAMESPACE,
+    MISMO_REFERENCE_MODEL,
+    XML_EXTENSION_NAMESPACE,
+    XML_EXTENSION_PREFIX,
+    XML_FLAG_ELEMENT,
+    XML_FLAG_PATH,
+    XML_MAPPINGS,
+    XML_SOURCE_LOCATION_ELEMENT,
+    XML_TOLERANCE_TYPES,
+)
+
+XML_MEDIA_TYPE = "application/xml"
+
+# (in extension?, container path, [(element, text)])
+ElementGroup = Tuple[bool, Tuple[str, ...], List[Tuple[str, str]]]
+
+
+def value_text(value: Any) -> str:
+    """Unescaped XML text for a value"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def field_groups(name: str, value: Any) -> List[ElementGroup]:
+    """Element groups for one output field, in document order; empty groups are dropped"""
+    in_extension, path, elements = XML_MAPPINGS[name]
+    extra = []
+    if name == "GFEOriginationCharges":
+        value = dict(
+            value,
+            section="OriginationCharges",
+            tolerance_bucket=XML_TOLERANCE_TYPES.get(
+                value.get("tolerance_bucket"), value.get("tolerance_bucket")
+            ),
+        )
+        details = [
+            (XML_FLAG_ELEMENT, value_text(flag)) for flag in value.get("flags") or []
+        ]
+        if value.get("source_location"):
+            details.append(
+                (XML_SOURCE_LOCATION_ELEMENT, value_text(value["source_location"]))
+            )
+        extra.append((True, XML_FLAG_PATH, details))
+
+    items = []
+    for element, key in elements:
+        item = value if key is None else value.get(key)
+        for entry in item if isinstance(item, list) else [item]:
+            if entry is not None:
+                items.append((element, value_text(entry)))
+    return [group for group in [(in_extension, path, items)] + extra if group[2]]
+
+
+def _wrap(path: Tuple[str, ...], body: List[str], prefix: str = "") -> List[str]:
+    return (
+        [f"<{prefix}{name}>" for name in path]
+        + body
+        + [f"</{prefix}{name}>" for name in reversed(path)]
+    )
+
+
+def _group_xml(
+    path: Tuple[str, ...], items: List[Tuple[str, str]], prefix: str = ""
+) -> List[str]:
+    body = [
+        f"<{prefix}{element}>{escape(text)}</{prefix}{element}>"
+        for element, text in items
+    ]
+    return _wrap(path, body, prefix)
+
+
+def mismo_deal(form: str, output: Dict[str, Any]) -> str:
+    """One DEAL element for a parsed disclosure"""
+    parts = [
+        "<DEAL><LOANS><LOAN>",
+        "<DOCUMENT_SPECIFIC_DATA_SETS><DOCUMENT_SPECIFIC_DATA_SET><INTEGRATED_DISCLOSURE>",
+        "<INTEGRATED_DISCLOSURE_DETAIL>",
+        f"<IntegratedDisclosureDocumentType>{DOCUMENT_TYPES[form]}</IntegratedDisclosureDocumentType>",
+        "</INTEGRATED_DISCLOSURE_DETAIL>",
+        "</INTEGRATED_DISCLOSURE></DOCUMENT_SPECIFIC_DATA_SET></DOCUMENT_SPECIFIC_DATA_SETS>",
+    ]
+    extension = []
+    for name in MISMO_FIELDS:
+        if output.get(name) is not None:
+            for in_extension, path, items in field_groups(name, output[name]):
+                if in_extension:
+                    extension += _group_xml(path, items, f"{XML_EXTENSION_PREFIX}:")
+                else:
+                    parts += _group_xml(path, items)
+    if extension:
+        parts += _wrap(("EXTENSION", "OTHER"), extension)
+    parts.append("</LOAN></LOANS></DEAL>")
+    return "".join(parts)
+
+
+def iter_mismo_xml(documents: Iterable[Tuple[str, Dict[str, Any]]]) -> Iterator[str]:
+    """Yield a MISMO MESSAGE for (form, output) pairs, one chunk per DEAL"""
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f"<MESSAGE xmlns={quoteattr(MISMO_NAMESPACE)}"
+        f" xmlns:{XML_EXTENSION_PREFIX}={quoteattr(XML_EXTENSION_NAMESPACE)}"
+        f" MISMOReferenceModelIdentifier={quoteattr(MISMO_REFERENCE_MODEL)}>"
+        "<DEAL_SETS><DEAL_SET><DEALS>"
+    )
+    for form, output in documents:
+        yield mismo_deal(form, output)
+    yield "</DEALS></DEAL_SET></DEAL_SETS></MESSAGE>\n"
@@ -0,0 +1,63 @@
+"""
+Per-page extraction cache for revised disclosures.
+
+Re-disclosed LEs and corrected CDs usually change one or two pages. Each page
+is fingerprinted from its content streams and the resources they draw with,
+read straight from the PDF's object table without loading or extracting the
+page. The extracted text and word columns are stored per fingerprint in the
+layout store's binary page format, so a revision only extracts the pages whose
+content changed and reuses the rest. The cache is a SQLite file under
+PDF_CACHE_DIR and is shared by every worker process.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+from utils.layout_store import PageLayout, decode_page, encode_page
+
+# Bump whenever extract_pages changes what it extracts so cached pages are not reused
+EXTRACTION_VERSION = 1
+
+
+class PageCache:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS extractions ("
+                " fingerprint TEXT, version INTEGER, layout BLOB,"
+                " PRIMARY KEY (fingerprint, version))"
+            )
+        return self._conn
+
+    def get(self, fingerprint: str) -> Optional[PageLayout]:
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT layout FROM extractions WHERE fingerprint = ? AND version = ?",
+                    (fingerprint, EXTRACTION_VERSION),
+                )
+                .fetchone()
+            )
+        return decode_page(row[0]) if row else None
+
+    def put(self, fingerprint: str, layout: PageLayout) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?)",
+                (fingerprint, EXTRACTION_VERSION, encode_page(layout)),
+            )
+            conn.commit()
+
+
+page_cache = PageCache(os.path.join(os.getenv("PDF_CACHE_DIR", "./cache"), "pages.db"))
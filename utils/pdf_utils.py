@@ -0,0 +1,280 @@
+"""
+PDF helpers shared by the LE/CD parsing tools.
+
+Documents are downloaded once, opened with PyMuPDF and only the pages a
+caller asks for are read. Every requested page is fingerprinted from the PDF's
+object table before it is loaded, so revised disclosures reuse cached
+extraction results for the pages that did not change.
+
+Pages are processed one at a time and released before the next is loaded (no
+pixmaps are rendered). Each request runs under a `RequestBudget` that caps its
+download size, page count and memory: the worker's RSS is sampled when the
+budget is created and after every page, and a request fails once RSS has grown
+by more than PDF_REQUEST_MEMORY_MB since its baseline. Concurrent requests in
+the same worker share that RSS, so the growth is an upper bound on what the
+request itself allocated. PDF_PROCESS_MEMORY_LIMIT_MB is a backstop for the
+whole worker; freed memory is rarely handed back to the OS, so a worker that
+stays over it after a garbage collection refuses PDFs until it is recycled.
+"""
+
+import gc
+import hashlib
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional
+import requests
+import pymupdf
+
+from utils.layout_store import PageLayout, page_layout
+from utils.metrics import current_rss_mb, metrics
+from utils.page_cache import PageCache
+
+logger = logging.getLogger(__name__)
+
+PDF_DOWNLOAD_TIMEOUT = 30
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+PDF_MAX_MB = float(os.getenv("PDF_MAX_MB", "50"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "200"))
+PDF_REQUEST_MEMORY_MB = float(os.getenv("PDF_REQUEST_MEMORY_MB", "256"))
+PDF_PROCESS_MEMORY_LIMIT_MB = float(os.getenv("PDF_PROCESS_MEMORY_LIMIT_MB", "1024"))
+# "reject" fails documents over the page budget; "truncate" reads only the first PDF_MAX_PAGES pages
+PDF_BUDGET_MODE = os.getenv("PDF_BUDGET_MODE", "reject")
+
+# Resources -> font -> font descriptor -> font program
+RESOURCE_DEPTH = 3
+_REFERENCE = re.compile(r"(\d+) \d+ R")
+
+
+class PageText(NamedTuple):
+    text: str
+    fingerprint: str
+    layout: Optional[PageLayout] = None
+
+
+class PDFError(ValueError):
+    """Raised when a disclosure PDF cannot be downloaded or read"""
+
+
+class PDFBudgetError(PDFError):
+    """Raised when a document exceeds its size, page or memory budget"""
+
+
+class RequestBudget:
+    """Per-request download size, page and memory limits, plus the process memory ceiling
+
+    Use as a context manager so every document is reported, including ones
+    rejected while downloading.
+    """
+
+    def __init__(
+        self,
+        max_mb: Optional[float] = None,
+        max_pages: Optional[int] = None,
+        memory_mb: Optional[float] = None,
+        process_limit_mb: Optional[float] = None,
+        mode: Optional[str] = None,
+    ):
+        self.max_mb = PDF_MAX_MB if max_mb is None else max_mb
+        self.max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+        self.memory_mb = PDF_REQUEST_MEMORY_MB if memory_mb is None else memory_mb
+        self.process_limit_mb = (
+            PDF_PROCESS_MEMORY_LIMIT_MB
+            if process_limit_mb is None
+            else process_limit_mb
+        )
+        self.mode = mode or PDF_BUDGET_MODE
+        self.download_bytes = 0
+        self.pages_read = 0
+        self.baseline_mb = current_rss_mb()
+        self.peak_growth_mb = 0.0
+        self.process_peak_mb = self.baseline_mb
+
+    def __enter__(self) -> "RequestBudget":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.report()
+
+    def page_limit(self, page_count: int) -> int:
+        """Number of leading pages that may be read"""
+        if page_count <= self.max_pages:
+            return page_count
+        if self.mode == "truncate":
+            logger.warning(
+                "Truncating %d-page PDF to the %d-page budget",
+                page_count,
+                self.max_pages,
+            )
+            metrics.increment("pdf_truncated")
+            return self.max_pages
+        metrics.increment("pdf_budget_rejections")
+        raise PDFBudgetError(
+            f"PDF has {page_count} pages, exceeding the {self.max_pages}-page budget"
+        )
+
+    def sample(self) -> None:
+        """Fail the request once its memory growth or the worker's RSS is over budget"""
+        rss = current_rss_mb()
+        growth = rss - self.baseline_mb
+        self.peak_growth_mb = max(self.peak_growth_mb, growth)
+        self.process_peak_mb = max(self.process_peak_mb, rss)
+        if growth > self.memory_mb:
+            metrics.increment("pdf_memory_rejections")
+            raise PDFBudgetError(
+                f"PDF grew worker memory by {growth:.0f} MiB, exceeding the {self.memory_mb:.0f} MiB budget"
+            )
+        if rss > self.process_limit_mb:
+            # Release what is only waiting for collection before refusing the request
+            gc.collect()
+            rss = current_rss_mb()
+            if rss > self.process_limit_mb:
+                metrics.increment("pdf_memory_rejections")
+                raise PDFBudgetError(
+                    f"Worker memory is {rss:.0f} MiB, over the {self.process_limit_mb:.0f} MiB limit; "
+                    "the worker needs recycling"
+                )
+
+    def report(self) -> None:
+        """Publish this request's figures to the metrics"""
+        metrics.increment("pdf_documents")
+        metrics.increment("pdf_pages_read", self.pages_read)
+        download_mb = round(self.download_bytes / 2**20, 2)
+        metrics.set("pdf_last_download_mb", download_mb)
+        metrics.set_max("pdf_max_download_mb", download_mb)
+        growth_mb = round(self.peak_growth_mb, 1)
+        metrics.set("pdf_last_request_growth_mb", growth_mb)
+        metrics.set_max("pdf_max_request_growth_mb", growth_mb)
+        # Process-wide: RSS includes every request running in this worker at the time
+        metrics.set_max("pdf_process_peak_rss_mb", round(self.process_peak_mb, 1))
+
+
+def fetch_pdf(
+    pdf_url: str,
+    timeout: int = PDF_DOWNLOAD_TIMEOUT,
+    budget: Optional[RequestBudget] = None,
+) -> bytes:
+    """Download a PDF and return its raw bytes, refusing bodies over the size budget"""
+    budget = budget or RequestBudget()
+    max_bytes = budget.max_mb * 2**20
+    try:
+        with requests.get(pdf_url, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            chunks, size = [], 0
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                budget.download_bytes = size
+                if size > max_bytes:
+                    metrics.increment("pdf_budget_rejections")
+                    raise PDFBudgetError(
+                        f"PDF at {pdf_url} exceeds the {max_bytes / 2**20:.0f} MiB size budget"
+                    )
+                chunks.append(chunk)
+    except requests.RequestException as e:
+        raise PDFError(f"Error downloading PDF from {pdf_url}: {e}") from e
+    return b"".join(chunks)
+
+
+def open_pdf(data: bytes) -> pymupdf.Document:
+    """Open PDF bytes as a PyMuPDF document"""
+    try:
+        return pymupdf.open(stream=data, filetype="pdf")
+    except Exception as e:
+        raise PDFError(f"Error opening PDF: {e}") from e
+
+
+def _references(source: str) -> List[int]:
+    return [int(xref) for xref in _REFERENCE.findall(source)]
+
+
+def _page_resources(doc: pymupdf.Document, xref: int) -> str:
+    """The page's /Resources entry, inherited from the page tree when the page has none"""
+    kind, resources = doc.xref_get_key(xref, "Resources")
+    while kind == "null":
+        kind, parent = doc.xref_get_key(xref, "Parent")
+        if kind != "xref":
+            return ""
+        xref = _references(parent)[0]
+        kind, resources = doc.xref_get_key(xref, "Resources")
+    return resources
+
+
+def _content_streams(doc: pymupdf.Document, xref: int) -> List[int]:
+    """xrefs of the page's content streams
+
+    /Contents is a stream, an array of streams, or a reference to such an array.
+    """
+    kind, contents = doc.xref_get_key(xref, "Contents")
+    refs = _references(contents)
+    if kind == "xref" and refs and not doc.xref_is_stream(refs[0]):
+        refs = _references(doc.xref_object(refs[0], compressed=True))
+    return refs
+
+
+def page_fingerprint(doc: pymupdf.Document, page_number: int) -> str:
+    """Hash of a 1-based page's content streams and the resources they draw with
+
+    Read from the object table without loading the page, so a cache hit costs
+    no text extraction at all.
+    """
+    xref = doc.page_xref(page_number - 1)
+    digest = hashlib.sha256()
+    for content in _content_streams(doc, xref):
+        digest.update(doc.xref_stream_raw(content) or b"")
+    resources = _page_resources(doc, xref)
+    digest.update(resources.encode("utf-8"))
+
+    seen, frontier = set(), _references(resources)
+    for _ in range(RESOURCE_DEPTH):
+        referenced = []
+        for ref in frontier:
+            if ref in seen:
+                continue
+            seen.add(ref)
+            source = doc.xref_object(ref, compressed=True)
+            digest.update(source.encode("utf-8"))
+            # Font programs, ToUnicode maps and form XObjects change the text; image pixels do not
+            if doc.xref_is_stream(ref) and "/Image" not in source:
+                digest.update(doc.xref_stream_raw(ref) or b"")
+            referenced.extend(_references(source))
+        frontier = referenced
+    return digest.hexdigest()
+
+
+def extract_pages(
+    doc: pymupdf.Document,
+    pages: Iterable[int],
+    budget: Optional[RequestBudget] = None,
+    cache: Optional[PageCache] = None,
+) -> Dict[int, PageText]:
+    """Text, fingerprint and word layout of the given 1-based pages
+
+    Pages the document lacks are skipped. Pages found in `cache` by fingerprint
+    are never loaded; the rest are loaded one at a time and dropped before the
+    next one is loaded.
+    """
+    budget = budget or RequestBudget()
+    limit = budget.page_limit(doc.page_count)
+    result = {}
+    for page_number in sorted(set(pages)):
+        if not 1 <= page_number <= limit:
+            continue
+        fingerprint = page_fingerprint(doc, page_number)
+        cached = cache.get(fingerprint) if cache else None
+        if cached is not None:
+            result[page_number] = PageText(cached.text, fingerprint, cached)
+            metrics.increment("pdf_pages_cached")
+            continue
+        page = doc.load_page(page_number - 1)
+        # One text page serves both the plain text and the word boxes
+        textpage = page.get_textpage()
+        text = page.get_text(textpage=textpage)
+        layout = page_layout(text, page.get_text("words", textpage=textpage))
+        result[page_number] = PageText(text, fingerprint, layout)
+        del textpage, page
+        if cache:
+            cache.put(fingerprint, layout)
+        budget.pages_read += 1
+        budget.sample()
+    return result